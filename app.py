@@ -13,39 +13,120 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
+import math
+import socket
+import struct
+import inspect
 from datetime import datetime, timedelta
 import time
 import os
+import io
+import csv
 import json
 import logging
+from collections import namedtuple
+from contextlib import contextmanager
+import tsz
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote
 
 # Try to import Modbus libraries (optional for demonstration)
 try:
     from pymodbus.client import ModbusTcpClient as ModbusClient
-    from pymodbus.payload import BinaryPayloadDecoder
-    from pymodbus.constants import Endian
     MODBUS_AVAILABLE = True
 except ImportError:
     try:
         # Try older pymodbus version
         from pymodbus.client.sync import ModbusTcpClient as ModbusClient
-        from pymodbus.payload import BinaryPayloadDecoder
-        from pymodbus.constants import Endian
         MODBUS_AVAILABLE = True
     except ImportError:
         MODBUS_AVAILABLE = False
-        st.warning("⚠️ PyModbus not installed. Running in demo mode with simulated data.\n\nTo install: `pip install pymodbus`")
 
-# Set page configuration
-st.set_page_config(
-    page_title="Multi-Meter PAC3200 Monitor",
-    page_icon="⚡",
-    layout="wide",
-    initial_sidebar_state="expanded"
+def _modbus_unit_kwarg(read_method):
+    """Name of the unit id keyword: device_id (3.10+), slave (3.x) or unit (2.x)"""
+    try:
+        params = inspect.signature(read_method).parameters
+    except (TypeError, ValueError):
+        return 'unit'
+    for name in ('device_id', 'slave', 'unit'):
+        if name in params:
+            return name
+    return 'unit'
+
+MODBUS_UNIT_KWARG = _modbus_unit_kwarg(ModbusClient.read_holding_registers) if MODBUS_AVAILABLE else 'unit'
+
+# Columnar Parquet archive queried through DuckDB (optional)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import duckdb
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# st.fragment reruns one section instead of the whole page (Streamlit 1.37+,
+# experimental in 1.33); older versions render the section as a plain function
+FRAGMENTS_AVAILABLE = hasattr(st, 'fragment') or hasattr(st, 'experimental_fragment')
+if hasattr(st, 'fragment'):
+    fragment = st.fragment
+elif hasattr(st, 'experimental_fragment'):
+    fragment = st.experimental_fragment
+else:
+    def fragment(func=None, *, run_every=None):
+        if func is None:
+            return lambda f: f
+        return func
+
+# Modbus limits a single Read Holding Registers request to 125 registers
+MAX_READ_REGISTERS = 125
+
+# Unused registers a run may span to avoid starting another request
+READ_GAP_TOLERANCE = 4
+
+# Upper bound on meters read in parallel when polling from threads
+MAX_POLL_WORKERS = 16
+
+# Pooled Modbus sockets unused for this long are closed by the sweeper
+POOL_IDLE_SECONDS = 60
+
+# Query results are cached per data version; the TTL bounds drift of the
+# "last N hours" window while no new readings arrive
+READ_CACHE_TTL = 60
+READ_CACHE_MAX_ENTRIES = 256
+
+# Hour-partitioned Parquet files: PARQUET_DIR/meter=<id>/hour=<YYYYMMDDHH>/*.parquet
+PARQUET_DIR = 'data'
+
+# Readings older than the longest dashboard window are packed into compressed
+# blocks of COMPACT_BLOCK_SIZE rows per meter
+COMPACT_AFTER_HOURS = 168
+COMPACT_BLOCK_SIZE = 1024
+
+# Rows formatted per pass when writing CSV exports
+CSV_CHUNK_ROWS = 50000
+
+# Plotted traces are downsampled (LTTB) to at most this many points
+MAX_PLOT_POINTS = 1500
+
+# Auto refresh reruns the overview on this period
+AUTO_REFRESH_SECONDS = 30
+
+# Columns the overview cards and alerts need from the latest reading
+LATEST_SUMMARY_COLUMNS = (
+    'Total_Active_Power', 'Average_Voltage_Vph_n', 'Average_Current', 'Total_Power_Factor',
+    'Frequency', 'THD_R_Voltage_1', 'THD_R_Current_1',
+)
+
+# Columns the individual meter tab shows and plots
+METER_DETAIL_COLUMNS = (
+    'Total_Active_Power', 'Frequency', 'V1_N_Voltage', 'V2_N_Voltage', 'V3_N_Voltage',
+    'L1_Current', 'L2_Current', 'L3_Current', 'Total_Power_Factor', 'Total_Active_Energy',
 )
 
 # Custom CSS for better styling
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .metric-card {
         background-color: #f0f2f6;
@@ -82,7 +163,390 @@ st.markdown("""
         margin-top: 10px;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+@st.cache_resource(show_spinner=False)
+def _inject_css():
+    """Emit the custom CSS; Streamlit replays the cached element on later reruns"""
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+    return True
+
+def _connect(db_name, *pragmas):
+    """Open a cross-thread autocommit SQLite connection in WAL mode with the shared read tuning"""
+    conn = sqlite3.connect(db_name, check_same_thread=False, isolation_level=None)
+    for pragma in ("journal_mode=WAL", "mmap_size=268435456", "cache_size=-65536", "temp_store=MEMORY") + pragmas:
+        conn.execute(f"PRAGMA {pragma}")
+    return conn
+
+@st.cache_resource(show_spinner=False)
+def _db_writer(db_name):
+    """Process-wide SQLite writer; every write goes through _write_transaction on it"""
+    return _connect(db_name, "synchronous=NORMAL")
+
+@st.cache_resource(show_spinner=False)
+def _db_reader(db_name):
+    """Process-wide read-only SQLite connection; under WAL it never waits on the writer"""
+    return _connect(db_name, "query_only=ON")
+
+@st.cache_resource(show_spinner=False)
+def _db_write_lock():
+    """Serializes write transactions on the shared SQLite connection across sessions"""
+    return threading.RLock()
+
+@contextmanager
+def _write_transaction(conn):
+    """BEGIN/COMMIT on the shared writer under the write lock; rolls back and re-raises on error"""
+    with _db_write_lock():
+        conn.execute("BEGIN")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+@st.cache_resource(show_spinner=False)
+def _duckdb():
+    """In-process DuckDB connection used to query the Parquet archive"""
+    return duckdb.connect()
+
+def _meter_parquet_dir(parquet_dir, meter_id):
+    """Partition directory holding one meter's Parquet files"""
+    return os.path.join(parquet_dir, f"meter={quote(str(meter_id), safe='')}")
+
+def _clear_reading_caches():
+    """Drop cached query results when the readings table or meter list changes"""
+    _load_meter_readings.clear()
+    _load_named_readings.clear()
+    _load_all_meters_latest.clear()
+    _load_aggregated_data.clear()
+    _load_hourly_system_power.clear()
+    _load_system_stats.clear()
+    _load_parquet_history.clear()
+    build_comparison_fig.clear()
+    build_power_pie_fig.clear()
+    build_system_trend_fig.clear()
+    build_meter_trend_figs.clear()
+    build_hourly_load_fig.clear()
+    build_raw_export_csv.clear()
+
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=READ_CACHE_MAX_ENTRIES, show_spinner=False)
+def _load_meter_readings(db_name, meter_id, hours, db_version, columns=None):
+    """Load readings for a specific meter, optionally projected to timestamp plus columns"""
+    try:
+        conn = _db_reader(db_name)
+        end_time = datetime.now()
+        start_time = end_time - timedelta(hours=hours)
+        
+        selected = '*' if columns is None else ', '.join(['timestamp', *columns])
+        query = f'''
+            SELECT {selected} FROM pac3200_readings 
+            WHERE meter_id = ? AND timestamp BETWEEN ? AND ?
+            ORDER BY timestamp DESC
+        '''
+        
+        df = pd.read_sql_query(query, conn, params=[meter_id, start_time, end_time])
+        return df
+        
+    except Exception as e:
+        return pd.DataFrame()
+
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=READ_CACHE_MAX_ENTRIES, show_spinner=False)
+def _load_named_readings(db_name, meter_ids, hours, db_version):
+    """Load readings for several meters (None for all) with each meter's name joined on"""
+    try:
+        conn = _db_reader(db_name)
+        end_time = datetime.now()
+        start_time = end_time - timedelta(hours=hours)
+        
+        meter_filter = ''
+        params = [start_time, end_time]
+        if meter_ids is not None:
+            meter_filter = f"AND r.meter_id IN ({', '.join('?' * len(meter_ids))})"
+            params.extend(meter_ids)
+        
+        query = f'''
+            SELECT r.*, m.name as meter_name
+            FROM pac3200_readings r
+            INNER JOIN meters_config m ON r.meter_id = m.meter_id
+            WHERE r.timestamp BETWEEN ? AND ? {meter_filter}
+            ORDER BY r.meter_id, r.timestamp DESC
+        '''
+        
+        df = pd.read_sql_query(query, conn, params=params)
+        return df
+        
+    except Exception as e:
+        return pd.DataFrame()
+
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=READ_CACHE_MAX_ENTRIES, show_spinner=False)
+def _load_all_meters_latest(db_name, columns, db_version):
+    """Load the latest reading for all meters, optionally projected to columns"""
+    try:
+        conn = _db_reader(db_name)
+        
+        selected = 'r.*' if columns is None else ', '.join(f'r.{col}' for col in ['meter_id', 'timestamp', *columns])
+        
+        # One index seek on (meter_id, timestamp DESC) per configured meter
+        query = f'''
+            SELECT {selected}, m.name, m.location
+            FROM meters_config m
+            INNER JOIN pac3200_readings r ON r.id = (
+                SELECT id FROM pac3200_readings
+                WHERE meter_id = m.meter_id
+                ORDER BY timestamp DESC
+                LIMIT 1
+            )
+            ORDER BY m.name
+        '''
+        
+        df = pd.read_sql_query(query, conn)
+        return df
+        
+    except Exception as e:
+        return pd.DataFrame()
+
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=READ_CACHE_MAX_ENTRIES, show_spinner=False)
+def _load_aggregated_data(db_name, hours, bucket_seconds, db_version):
+    """Load system totals from all meters, bucketed into bucket_seconds intervals"""
+    try:
+        conn = _db_reader(db_name)
+        end_time = datetime.now()
+        start_time = end_time - timedelta(hours=hours)
+        
+        query = '''
+            SELECT 
+                datetime(CAST(strftime('%s', timestamp) AS INTEGER) / ? * ?, 'unixepoch') as timestamp,
+                SUM(Total_Active_Power) * COUNT(DISTINCT meter_id) / COUNT(Total_Active_Power) as Total_System_Power,
+                AVG(Frequency) as Avg_Frequency,
+                AVG(Total_Power_Factor) as Avg_Power_Factor,
+                COUNT(DISTINCT meter_id) as Active_Meters
+            FROM pac3200_readings
+            WHERE timestamp BETWEEN ? AND ?
+            GROUP BY 1
+            ORDER BY 1
+        '''
+        
+        df = pd.read_sql_query(query, conn, params=[bucket_seconds, bucket_seconds, start_time, end_time])
+        return df
+        
+    except Exception as e:
+        return pd.DataFrame()
+
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=READ_CACHE_MAX_ENTRIES, show_spinner=False)
+def _load_hourly_system_power(db_name, hours, db_version):
+    """Load the summed active power of all meters per hour"""
+    try:
+        conn = _db_reader(db_name)
+        end_time = datetime.now()
+        start_time = end_time - timedelta(hours=hours)
+        
+        query = '''
+            SELECT 
+                strftime('%Y-%m-%d %H:00:00', timestamp) as timestamp,
+                SUM(Total_Active_Power) as Total_Active_Power
+            FROM pac3200_readings
+            WHERE timestamp BETWEEN ? AND ?
+            GROUP BY 1
+            ORDER BY 1
+        '''
+        
+        df = pd.read_sql_query(query, conn, params=[start_time, end_time])
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df
+        
+    except Exception as e:
+        return pd.DataFrame()
+
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=READ_CACHE_MAX_ENTRIES, show_spinner=False)
+def _load_system_stats(db_name, hours, db_version):
+    """Load energy, power factor and demand statistics for all meters in one row"""
+    try:
+        conn = _db_reader(db_name)
+        end_time = datetime.now()
+        start_time = end_time - timedelta(hours=hours)
+        
+        query = '''
+            WITH windowed AS (
+                SELECT meter_id, timestamp, Total_Active_Power, Total_Power_Factor, Total_Active_Energy
+                FROM pac3200_readings
+                WHERE timestamp BETWEEN ? AND ?
+            ),
+            demand AS (
+                SELECT SUM(Total_Active_Power) as power
+                FROM windowed
+                GROUP BY timestamp
+            ),
+            ranked AS (
+                SELECT Total_Active_Energy,
+                       ROW_NUMBER() OVER (PARTITION BY meter_id ORDER BY timestamp DESC) as rn
+                FROM windowed
+            ),
+            latest AS (
+                SELECT Total_Active_Energy FROM ranked WHERE rn = 1
+            )
+            SELECT 
+                (SELECT COUNT(*) FROM windowed) as Readings,
+                (SELECT SUM(Total_Active_Energy) FROM latest) as Total_Energy,
+                (SELECT AVG(Total_Power_Factor) FROM windowed) as Avg_Power_Factor,
+                (SELECT MAX(power) FROM demand) as Peak_Demand,
+                (SELECT AVG(power) FROM demand) as Avg_Demand
+        '''
+        
+        df = pd.read_sql_query(query, conn, params=[start_time, end_time])
+        return df
+        
+    except Exception as e:
+        return pd.DataFrame()
+
+# One coalesced register read: (offset, name) pairs for the fallback path,
+# plus precompiled structs that decode the whole run in one call
+ReadRun = namedtuple('ReadRun', ['start', 'count', 'params', 'names', 'packer', 'unpacker'])
+
+def make_read_run(start, params):
+    """Build a ReadRun for float32 params given as (offset, name); gaps are skipped as pad bytes"""
+    count = params[-1][0] + 2
+    fmt = ['>']
+    pos = 0
+    for offset, _ in params:
+        if offset > pos:
+            fmt.append(f'{(offset - pos) * 2}x')
+        fmt.append('f')
+        pos = offset + 2
+    return ReadRun(
+        start=start,
+        count=count,
+        params=params,
+        names=tuple(name for _, name in params),
+        packer=struct.Struct(f'>{count}H'),
+        unpacker=struct.Struct(''.join(fmt)),
+    )
+
+def _open_modbus_socket(client):
+    """(Re)connect a Modbus client with Nagle's algorithm disabled"""
+    if not client.connect():
+        return False
+    sock = getattr(client, 'socket', None)
+    if sock is not None:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return True
+
+class ModbusConnectionPool:
+    """One Modbus/TCP client per (host, port), shared by every meter behind that endpoint"""
+    def __init__(self, idle_seconds=POOL_IDLE_SECONDS):
+        self.idle_seconds = idle_seconds
+        self._entries = {}
+        self._lock = threading.Lock()
+        
+        sweeper = threading.Thread(target=self._sweep, name="modbus-pool-sweeper", daemon=True)
+        sweeper.start()
+    
+    def _entry(self, host, port, timeout):
+        """Get or create the pool entry for an endpoint and mark it used"""
+        key = (host, port)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {
+                    'client': ModbusClient(host=host, port=port, timeout=timeout),
+                    'lock': threading.Lock(),
+                    'refs': 0,
+                }
+                self._entries[key] = entry
+            entry['last_used'] = time.monotonic()
+            return entry
+    
+    def acquire(self, host, port, timeout):
+        """Register a meter as a user of the endpoint's client"""
+        entry = self._entry(host, port, timeout)
+        with self._lock:
+            entry['refs'] += 1
+        return entry
+    
+    def release(self, host, port):
+        """Drop a meter's reference; the last one out closes the socket"""
+        with self._lock:
+            entry = self._entries.get((host, port))
+            if entry is None:
+                return
+            entry['refs'] -= 1
+            if entry['refs'] > 0:
+                return
+            del self._entries[(host, port)]
+        
+        with entry['lock']:
+            entry['client'].close()
+    
+    def get(self, host, port, timeout):
+        """Entry with the shared client and the lock serializing its requests"""
+        return self._entry(host, port, timeout)
+    
+    def _sweep(self):
+        """Close sockets idle for longer than idle_seconds; they reopen on next use"""
+        while True:
+            time.sleep(self.idle_seconds / 2)
+            cutoff = time.monotonic() - self.idle_seconds
+            
+            with self._lock:
+                idle = [(key, entry) for key, entry in self._entries.items()
+                        if entry['last_used'] < cutoff]
+                for key, entry in idle:
+                    if entry['refs'] <= 0:
+                        del self._entries[key]
+            
+            for key, entry in idle:
+                # Skip entries that are mid-request; they are no longer idle
+                if entry['lock'].acquire(blocking=False):
+                    try:
+                        if entry['client'].is_socket_open():
+                            entry['client'].close()
+                    except Exception as e:
+                        logging.debug(f"Closing idle Modbus client {key} failed: {e}")
+                    finally:
+                        entry['lock'].release()
+
+@st.cache_resource(show_spinner=False)
+def _archive_open_hours():
+    """Newest Parquet hour written per (archive dir, meter), shared across sessions"""
+    return {}
+
+@st.cache_resource(show_spinner=False)
+def get_modbus_pool():
+    """Process-wide Modbus connection pool kept across Streamlit reruns"""
+    return ModbusConnectionPool()
+
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=READ_CACHE_MAX_ENTRIES, show_spinner=False)
+def _load_parquet_history(parquet_dir, meter_id, parameter, hours, db_version):
+    """Load one parameter's history for a meter from the Parquet archive"""
+    try:
+        end_time = datetime.now()
+        start_time = end_time - timedelta(hours=hours)
+        files = os.path.join(_meter_parquet_dir(parquet_dir, meter_id), 'hour=*', '*.parquet')
+        
+        query = f'''
+            SELECT timestamp, "{parameter}"
+            FROM read_parquet('{files.replace("'", "''")}', hive_partitioning = true)
+            WHERE hour >= ? AND timestamp BETWEEN ? AND ?
+            ORDER BY timestamp DESC
+        '''
+        
+        return _duckdb().cursor().execute(
+            query, [int(start_time.strftime('%Y%m%d%H')), start_time, end_time]
+        ).df()
+        
+    except Exception as e:
+        return None
+
+def _parameter_history(db_name, parquet_dir, meter_id, parameter, hours, db_version):
+    """Timestamp and one parameter for a meter, from Parquet when available, else SQLite"""
+    if PARQUET_AVAILABLE:
+        df = _load_parquet_history(parquet_dir, meter_id, parameter, hours, db_version)
+        if df is not None and not df.empty:
+            return df
+    
+    df = _load_meter_readings(db_name, meter_id, hours, db_version, (parameter,))
+    return df if parameter in df.columns else pd.DataFrame()
 
 class PAC3200Meter:
     """Single PAC3200 meter instance"""
@@ -95,8 +559,9 @@ class PAC3200Meter:
         self.timeout = timeout
         self.location = location
         self.description = description
-        self.client = None
         self.connected = False
+        self._unit_kwargs = {MODBUS_UNIT_KWARG: unit_id}
+        self._pooled = False
         self.last_reading = None
         self.last_reading_time = None
         
@@ -116,7 +581,7 @@ class PAC3200Meter:
             # Current Measurements  
             'L1_Current': 13, 'L2_Current': 15, 'L3_Current': 17,
             'Maximum_Current_1': 87, 'Maximum_Current_2': 89, 'Maximum_Current_3': 91,
-            'Minimum_Current_1': 157, 'Maximum_Current_2': 159, 'Minimum_Current_3': 161,
+            'Minimum_Current_1': 157, 'Minimum_Current_2': 159, 'Minimum_Current_3': 161,
             'Average_Current': 61,
             'THD_R_Current_1': 49, 'THD_R_Current_2': 51, 'THD_R_Current_3': 53,
             'Amplitude_Unbalance_Current': 73,
@@ -148,66 +613,101 @@ class PAC3200Meter:
             'Total_Active_Energy': 801,
             'Total_Reactive_Energy': 805,
         }
+        
+        # (name, address) pairs in address order, shared by the reader and the simulator
+        self._reg_items = sorted(self.registers.items(), key=lambda kv: kv[1])
+        
+        # Contiguous register runs, so each refresh needs a handful of bulk reads
+        self._read_runs = self._build_read_runs()
+        self._init_simulation()
+    
+    def _build_read_runs(self):
+        """Group float32 registers into runs of at most MAX_READ_REGISTERS, bridging small gaps"""
+        runs = []
+        start = prev = None
+        params = []
+        
+        for param_name, register_addr in self._reg_items:
+            gap = None if start is None else register_addr - (prev + 2)
+            if (gap is None or gap < 0 or gap > READ_GAP_TOLERANCE
+                    or register_addr + 2 - start > MAX_READ_REGISTERS):
+                if params:
+                    runs.append(make_read_run(start, params))
+                start = register_addr
+                params = []
+            params.append((register_addr - start, param_name))
+            prev = register_addr
+        
+        if params:
+            runs.append(make_read_run(start, params))
+        
+        return runs
+    
+    def _ensure_socket(self, client):
+        """Return the pooled client, reconnecting it if the socket was dropped"""
+        if not client.is_socket_open() and not _open_modbus_socket(client):
+            return None
+        return client
+    
+    def _read_registers(self, address, count):
+        """Issue one request on the pooled socket; None if it cannot be opened"""
+        entry = get_modbus_pool().get(self.host, self.port, self.timeout)
+        
+        # Meters on one gateway take turns on its socket
+        with entry['lock']:
+            client = self._ensure_socket(entry['client'])
+            if not client:
+                return None
+            
+            try:
+                return client.read_holding_registers(address, count=count, **self._unit_kwargs)
+            except Exception:
+                # Drop the socket so the next request reconnects
+                client.close()
+                raise
     
     def connect(self):
         """Connect to PAC3200"""
         if not MODBUS_AVAILABLE:
             self.connected = True
             return True
+        
+        if not self._pooled:
+            get_modbus_pool().acquire(self.host, self.port, self.timeout)
+            self._pooled = True
             
         try:
-            if self.client:
-                self.client.close()
-            
-            self.client = ModbusClient(host=self.host, port=self.port, timeout=self.timeout)
-            connected = self.client.connect()
-            
-            if connected:
-                # Test connection by reading a simple register
-                test_result = self.client.read_holding_registers(1, 2, unit=self.unit_id)
-                if test_result.isError():
-                    self.connected = False
-                    return False
-                self.connected = True
-                return True
-            else:
+            # Test connection by reading a simple register
+            test_result = self._read_registers(1, 2)
+            if test_result is None or test_result.isError():
                 self.connected = False
                 return False
+            self.connected = True
+            return True
                 
         except Exception as e:
             self.connected = False
             return False
     
     def disconnect(self):
-        """Disconnect from PAC3200"""
-        if self.client and MODBUS_AVAILABLE:
-            self.client.close()
+        """Disconnect from PAC3200; the pooled socket closes once no meter uses it"""
+        if self._pooled:
+            get_modbus_pool().release(self.host, self.port)
+            self._pooled = False
         self.connected = False
     
     def read_float32_register(self, register_address):
         """Read a 32-bit float from PAC3200"""
-        if not MODBUS_AVAILABLE:
-            # Return simulated data for demo
-            return self._generate_simulated_value(register_address)
-            
         try:
-            if not self.client or not self.client.is_socket_open():
-                return None
-                
-            rr = self.client.read_holding_registers(register_address, 2, unit=self.unit_id)
+            rr = self._read_registers(register_address, 2)
             
-            if rr.isError():
+            if rr is None or rr.isError():
                 return None
                 
-            decoder = BinaryPayloadDecoder.fromRegisters(
-                rr.registers, 
-                byteorder=Endian.Big, 
-                wordorder=Endian.Big
-            )
-            
-            value = decoder.decode_32bit_float()
+            # Big-endian float32 spread over two big-endian registers
+            value = struct.unpack('>f', struct.pack('>2H', *rr.registers[:2]))[0]
             
-            if np.isnan(value) or np.isinf(value):
+            if not math.isfinite(value):
                 return None
                 
             return value
@@ -215,57 +715,100 @@ class PAC3200Meter:
         except Exception as e:
             return None
     
-    def _generate_simulated_value(self, register_address):
-        """Generate simulated values for demo purposes"""
+    def _init_simulation(self):
+        """Precompute per-register coefficients for vectorized demo values"""
         # Add some variation based on meter_id to differentiate meters
-        meter_offset = hash(self.meter_id) % 10 / 10.0
+        self._sim_offset = (hash(self.meter_id) % 10) / 10.0
         
-        voltage_registers = [1, 3, 5, 7, 9, 11, 57, 59]
-        current_registers = [13, 15, 17, 61]
-        power_registers = [25, 27, 29, 31, 33, 35, 19, 21, 23, 65, 67, 63]
-        power_factor_registers = [37, 39, 41, 69]
-        frequency_registers = [55]
-        thd_registers = [43, 45, 47, 49, 51, 53]
-        energy_registers = [801, 805]
+        self._sim_names = [name for name, _ in self._reg_items]
+        addrs = np.array([addr for _, addr in self._reg_items])
+        
+        masks = [
+            np.isin(addrs, [57, 59]),                          # Average voltages
+            np.isin(addrs, [1, 3, 5, 7, 9, 11]),               # Phase voltages
+            np.isin(addrs, [13, 15, 17, 61]),                  # Currents
+            addrs == 65,                                       # Total active power
+            np.isin(addrs, [67, 63]),                          # Total reactive/apparent power
+            np.isin(addrs, [25, 27, 29, 31, 33, 35, 19, 21, 23]),  # Phase powers
+            np.isin(addrs, [37, 39, 41, 69]),                  # Power factor
+            addrs == 55,                                       # Frequency
+            np.isin(addrs, [43, 45, 47, 49, 51, 53]),          # THD
+            np.isin(addrs, [801, 805]),                        # Energy
+        ]
+        # (base, variation scale, meter offset scale, time scale, uses |variation|)
+        coefficients = [
+            (230, 10, 5, 0, False),
+            (230, 15, 5, 0, False),
+            (10, 5, 3, 0, False),
+            (2300, 300, 500, 0, False),
+            (2400, 320, 500, 0, False),
+            (760, 100, 150, 0, False),
+            (0.85, 0.1, 0, 0, False),
+            (50.0, 0.2, 0, 0, False),
+            (2.5, 2, 0, 0, True),
+            (1000000, 0, 100000, 100, False),
+        ]
+        default = (0, 100, 0, 0, True)
+        
+        (self._sim_base, self._sim_scale, self._sim_offset_scale,
+         self._sim_time_scale, self._sim_abs) = (
+            np.select(masks, [c[i] for c in coefficients], default[i]) for i in range(len(default))
+        )
+    
+    def _simulate_all(self):
+        """Generate simulated values for every register in one vectorized pass"""
+        meter_offset = self._sim_offset
         
         base_time = time.time()
         variation = np.sin(base_time / 10 + meter_offset) * 0.1 + np.random.normal(0, 0.02)
         
-        if register_address in voltage_registers:
-            if register_address in [57, 59]:
-                return 230 + variation * 10 + meter_offset * 5
-            else:
-                return 230 + variation * 15 + meter_offset * 5
-        elif register_address in current_registers:
-            return 10 + variation * 5 + meter_offset * 3
-        elif register_address in power_registers:
-            if register_address == 65:
-                return 2300 + variation * 300 + meter_offset * 500
-            elif register_address in [67, 63]:
-                return 2400 + variation * 320 + meter_offset * 500
-            else:
-                return 760 + variation * 100 + meter_offset * 150
-        elif register_address in power_factor_registers:
-            return 0.85 + variation * 0.1
-        elif register_address in frequency_registers:
-            return 50.0 + variation * 0.2
-        elif register_address in thd_registers:
-            return 2.5 + abs(variation) * 2
-        elif register_address in energy_registers:
-            return 1000000 + base_time * 100 + meter_offset * 100000
-        else:
-            return abs(variation) * 100
+        values = (self._sim_base
+                  + self._sim_scale * np.where(self._sim_abs, abs(variation), variation)
+                  + self._sim_offset_scale * meter_offset
+                  + self._sim_time_scale * base_time)
+        
+        return dict(zip(self._sim_names, values.tolist()))
+    
+    def _read_run(self, run):
+        """Read one contiguous register run with a single request"""
+        rr = self._read_registers(run.start, run.count)
+        if rr is None or rr.isError():
+            return None
+        
+        return self._decode_run(rr.registers, run)
+    
+    def _decode_run(self, registers, run):
+        """Decode every float32 in a run with its precompiled structs"""
+        floats = run.unpacker.unpack(run.packer.pack(*registers[:run.count]))
+        return {name: (value if math.isfinite(value) else None)
+                for name, value in zip(run.names, floats)}
     
     def read_all_parameters(self):
         """Read all parameters and return as dictionary"""
+        if not MODBUS_AVAILABLE:
+            data = self._simulate_all()
+            self.last_reading = data
+            self.last_reading_time = datetime.now()
+            return data
+        
         data = {}
         
-        for param_name, register_addr in self.registers.items():
+        for run in self._read_runs:
             try:
-                value = self.read_float32_register(register_addr)
-                data[param_name] = value
+                values = self._read_run(run)
             except Exception as e:
-                data[param_name] = None
+                values = None
+            
+            if values is None:
+                # Fall back to one request per register
+                values = {}
+                for offset, param_name in run.params:
+                    try:
+                        values[param_name] = self.read_float32_register(run.start + offset)
+                    except Exception as e:
+                        values[param_name] = None
+            
+            data.update(values)
         
         self.last_reading = data
         self.last_reading_time = datetime.now()
@@ -273,101 +816,154 @@ class PAC3200Meter:
 
 class MultiMeterDashboard:
     """Main dashboard managing multiple PAC3200 meters"""
-    def __init__(self, db_name='multi_pac3200_data.db'):
+    def __init__(self, db_name='multi_pac3200_data.db', parquet_dir=PARQUET_DIR):
         self.db_name = db_name
+        self.parquet_dir = parquet_dir
         self.meters = {}  # Dictionary of meter_id: PAC3200Meter instances
+        
+        # Long-lived writer connection; transactions are managed explicitly
+        self.conn = _db_writer(db_name)
+        
         self.init_database()
         self.load_meters_config()
     
     def init_database(self):
         """Initialize SQLite database with multi-meter support"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            # Check if old table exists with device_id column
-            cursor.execute("PRAGMA table_info(pac3200_readings)")
-            columns = [row[1] for row in cursor.fetchall()]
-            
-            if 'device_id' in columns:
-                # Old schema detected, need to migrate
-                st.info("Migrating database schema...")
+            conn = self.conn
+            # DDL runs under the writer lock so it never lands inside another session's batch
+            with _write_transaction(conn):
+                cursor = conn.cursor()
                 
-                # Backup old data if exists
-                cursor.execute("SELECT COUNT(*) FROM pac3200_readings")
-                count = cursor.fetchone()[0]
+                # Check if old table exists with device_id column
+                cursor.execute("PRAGMA table_info(pac3200_readings)")
+                columns = [row[1] for row in cursor.fetchall()]
                 
-                if count > 0:
-                    # Create backup
-                    cursor.execute("ALTER TABLE pac3200_readings RENAME TO pac3200_readings_backup")
-                else:
-                    # No data, just drop the table
-                    cursor.execute("DROP TABLE IF EXISTS pac3200_readings")
-            
-            # Create meters configuration table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS meters_config (
-                    meter_id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    host TEXT NOT NULL,
-                    port INTEGER NOT NULL,
-                    unit_id INTEGER NOT NULL,
-                    location TEXT,
-                    description TEXT,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+                if 'device_id' in columns:
+                    # Old schema detected, need to migrate
+                    st.info("Migrating database schema...")
+                
+                    # Backup old data if exists
+                    cursor.execute("SELECT COUNT(*) FROM pac3200_readings")
+                    count = cursor.fetchone()[0]
+                
+                    if count > 0:
+                        # Create backup
+                        cursor.execute("ALTER TABLE pac3200_readings RENAME TO pac3200_readings_backup")
+                    else:
+                        # No data, just drop the table
+                        cursor.execute("DROP TABLE IF EXISTS pac3200_readings")
+                
+                # Create meters configuration table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS meters_config (
+                        meter_id TEXT PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        host TEXT NOT NULL,
+                        port INTEGER NOT NULL,
+                        unit_id INTEGER NOT NULL,
+                        location TEXT,
+                        description TEXT,
+                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                
+                # Drop old table if exists and recreate with correct schema
+                cursor.execute("DROP TABLE IF EXISTS pac3200_readings")
+                
+                # Create readings table with meter_id
+                cursor.execute('''
+                    CREATE TABLE pac3200_readings (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        meter_id TEXT NOT NULL,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        V1_N_Voltage REAL, V2_N_Voltage REAL, V3_N_Voltage REAL,
+                        V1_V2_Voltage REAL, V2_V3_Voltage REAL, V3_V1_Voltage REAL,
+                        Maximum_Voltage_V1_n REAL, Maximum_Voltage_V2_n REAL, Maximum_Voltage_V3_n REAL,
+                        Maximum_Voltage_V1_2 REAL, Maximum_Voltage_V2_3 REAL, Maximum_Voltage_V3_1 REAL,
+                        Minimum_Voltage_V1_n REAL, Minimum_Voltage_V2_n REAL, Minimum_Voltage_V3_n REAL,
+                        Minimum_Voltage_V1_2 REAL, Minimum_Voltage_V2_3 REAL, Minimum_Voltage_V3_1 REAL,
+                        L1_Current REAL, L2_Current REAL, L3_Current REAL,
+                        Maximum_Current_1 REAL, Maximum_Current_2 REAL, Maximum_Current_3 REAL,
+                        Minimum_Current_1 REAL, Minimum_Current_2 REAL, Minimum_Current_3 REAL,
+                        L1_Active_Power REAL, L2_Active_Power REAL, L3_Active_Power REAL,
+                        Maximum_Active_Power_1 REAL, Maximum_Active_Power_2 REAL, Maximum_Active_Power_3 REAL,
+                        Minimum_Active_Power_1 REAL, Minimum_Active_Power_2 REAL, Minimum_Active_Power_3 REAL,
+                        L1_Reactive_Power REAL, L2_Reactive_Power REAL, L3_Reactive_Power REAL,
+                        Maximum_Reactive_Power_1 REAL, Maximum_Reactive_Power_2 REAL, Maximum_Reactive_Power_3 REAL,
+                        Minimum_Reactive_Power_1 REAL, Minimum_Reactive_Power_2 REAL, Minimum_Reactive_Power_3 REAL,
+                        L1_Apparent_Power REAL, L2_Apparent_Power REAL, L3_Apparent_Power REAL,
+                        Maximum_Apparent_Power_1 REAL, Maximum_Apparent_Power_2 REAL, Maximum_Apparent_Power_3 REAL,
+                        Minimum_Apparent_Power_1 REAL, Minimum_Apparent_Power_2 REAL, Minimum_Apparent_Power_3 REAL,
+                        L1_Power_Factor REAL, L2_Power_Factor REAL, L3_Power_Factor REAL,
+                        Maximum_Power_Factor_1 REAL, Maximum_Power_Factor_2 REAL, Maximum_Power_Factor_3 REAL,
+                        Minimum_Power_Factor_1 REAL, Minimum_Power_Factor_2 REAL, Minimum_Power_Factor_3 REAL,
+                        Total_Active_Power REAL, Total_Reactive_Power REAL, Total_Apparent_Power REAL,
+                        Total_Power_Factor REAL, Frequency REAL, Average_Current REAL,
+                        Average_Voltage_Vph_n REAL, Average_Voltage_Vph_ph REAL,
+                        THD_R_Voltage_1 REAL, THD_R_Voltage_2 REAL, THD_R_Voltage_3 REAL,
+                        THD_R_Current_1 REAL, THD_R_Current_2 REAL, THD_R_Current_3 REAL,
+                        Amplitude_Unbalance_Voltage REAL, Amplitude_Unbalance_Current REAL,
+                        Total_Active_Energy REAL, Total_Reactive_Energy REAL,
+                        FOREIGN KEY (meter_id) REFERENCES meters_config(meter_id)
+                    )
+                ''')
+                
+                # Create index for faster queries
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_readings_meter_timestamp 
+                    ON pac3200_readings(meter_id, timestamp DESC)
+                ''')
+                # Covers the time-window power sums, so they never touch table rows
+                cursor.execute("DROP INDEX IF EXISTS idx_readings_timestamp")
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_readings_timestamp_meter 
+                    ON pac3200_readings(timestamp, meter_id, Total_Active_Power)
+                ''')
+                
+                # Gorilla-compressed blocks of old readings, one row per column per block;
+                # they hold rows moved out of pac3200_readings, so they start over with it
+                cursor.execute("DROP TABLE IF EXISTS pac3200_blocks")
+                cursor.execute('''
+                    CREATE TABLE pac3200_blocks (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        meter_id TEXT NOT NULL,
+                        start_ts DATETIME NOT NULL,
+                        end_ts DATETIME NOT NULL,
+                        column_name TEXT NOT NULL,
+                        compressed_data BLOB NOT NULL
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_blocks_meter_start 
+                    ON pac3200_blocks(meter_id, start_ts)
+                ''')
+                
+                # The Parquet archive mirrors the readings table too
+                shutil.rmtree(self.parquet_dir, ignore_errors=True)
             
-            # Drop old table if exists and recreate with correct schema
-            cursor.execute("DROP TABLE IF EXISTS pac3200_readings")
+            # Cache the reading columns once so inserts never query the catalog
+            cursor.execute("PRAGMA table_info(pac3200_readings)")
+            existing_columns = [row[1] for row in cursor.fetchall()]
+            self._column_order = tuple(col for col in existing_columns
+                                       if col not in {'id', 'meter_id', 'timestamp'})
+            self._db_columns = frozenset(self._column_order)
+            
+            columns = ('meter_id', 'timestamp') + self._column_order
+            self._insert_sql = f'''
+                INSERT INTO pac3200_readings ({', '.join(columns)})
+                VALUES ({', '.join(['?' for _ in columns])})
+            '''
             
-            # Create readings table with meter_id
-            cursor.execute('''
-                CREATE TABLE pac3200_readings (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    meter_id TEXT NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    V1_N_Voltage REAL, V2_N_Voltage REAL, V3_N_Voltage REAL,
-                    V1_V2_Voltage REAL, V2_V3_Voltage REAL, V3_V1_Voltage REAL,
-                    Maximum_Voltage_V1_n REAL, Maximum_Voltage_V2_n REAL, Maximum_Voltage_V3_n REAL,
-                    Maximum_Voltage_V1_2 REAL, Maximum_Voltage_V2_3 REAL, Maximum_Voltage_V3_1 REAL,
-                    Minimum_Voltage_V1_n REAL, Minimum_Voltage_V2_n REAL, Minimum_Voltage_V3_n REAL,
-                    Minimum_Voltage_V1_2 REAL, Minimum_Voltage_V2_3 REAL, Minimum_Voltage_V3_1 REAL,
-                    L1_Current REAL, L2_Current REAL, L3_Current REAL,
-                    Maximum_Current_1 REAL, Maximum_Current_2 REAL, Maximum_Current_3 REAL,
-                    Minimum_Current_1 REAL, Minimum_Current_2 REAL, Minimum_Current_3 REAL,
-                    L1_Active_Power REAL, L2_Active_Power REAL, L3_Active_Power REAL,
-                    Maximum_Active_Power_1 REAL, Maximum_Active_Power_2 REAL, Maximum_Active_Power_3 REAL,
-                    Minimum_Active_Power_1 REAL, Minimum_Active_Power_2 REAL, Minimum_Active_Power_3 REAL,
-                    L1_Reactive_Power REAL, L2_Reactive_Power REAL, L3_Reactive_Power REAL,
-                    Maximum_Reactive_Power_1 REAL, Maximum_Reactive_Power_2 REAL, Maximum_Reactive_Power_3 REAL,
-                    Minimum_Reactive_Power_1 REAL, Minimum_Reactive_Power_2 REAL, Minimum_Reactive_Power_3 REAL,
-                    L1_Apparent_Power REAL, L2_Apparent_Power REAL, L3_Apparent_Power REAL,
-                    Maximum_Apparent_Power_1 REAL, Maximum_Apparent_Power_2 REAL, Maximum_Apparent_Power_3 REAL,
-                    Minimum_Apparent_Power_1 REAL, Minimum_Apparent_Power_2 REAL, Minimum_Apparent_Power_3 REAL,
-                    L1_Power_Factor REAL, L2_Power_Factor REAL, L3_Power_Factor REAL,
-                    Maximum_Power_Factor_1 REAL, Maximum_Power_Factor_2 REAL, Maximum_Power_Factor_3 REAL,
-                    Minimum_Power_Factor_1 REAL, Minimum_Power_Factor_2 REAL, Minimum_Power_Factor_3 REAL,
-                    Total_Active_Power REAL, Total_Reactive_Power REAL, Total_Apparent_Power REAL,
-                    Total_Power_Factor REAL, Frequency REAL, Average_Current REAL,
-                    Average_Voltage_Vph_n REAL, Average_Voltage_Vph_ph REAL,
-                    THD_R_Voltage_1 REAL, THD_R_Voltage_2 REAL, THD_R_Voltage_3 REAL,
-                    THD_R_Current_1 REAL, THD_R_Current_2 REAL, THD_R_Current_3 REAL,
-                    Amplitude_Unbalance_Voltage REAL, Amplitude_Unbalance_Current REAL,
-                    Total_Active_Energy REAL, Total_Reactive_Energy REAL,
-                    FOREIGN KEY (meter_id) REFERENCES meters_config(meter_id)
+            if PARQUET_AVAILABLE:
+                self._parquet_schema = pa.schema(
+                    [('meter_id', pa.string()), ('timestamp', pa.timestamp('s'))]
+                    + [(col, pa.float64()) for col in self._column_order]
                 )
-            ''')
             
-            # Create index for faster queries
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_readings_meter_timestamp 
-                ON pac3200_readings(meter_id, timestamp DESC)
-            ''')
-            
-            conn.commit()
-            conn.close()
+            # The readings table was recreated, so cached results are stale
+            _clear_reading_caches()
             return True
             
         except Exception as e:
@@ -382,20 +978,16 @@ class MultiMeterDashboard:
                                 location=location, description=description)
             
             # Save to database
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO meters_config 
-                (meter_id, name, host, port, unit_id, location, description, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            ''', (meter_id, name, host, port, unit_id, location, description))
-            
-            conn.commit()
-            conn.close()
+            with _write_transaction(self.conn):
+                self.conn.execute('''
+                    INSERT OR REPLACE INTO meters_config 
+                    (meter_id, name, host, port, unit_id, location, description, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ''', (meter_id, name, host, port, unit_id, location, description))
             
             # Add to meters dictionary
             self.meters[meter_id] = meter
+            _clear_reading_caches()
             return True
             
         except Exception as e:
@@ -411,11 +1003,9 @@ class MultiMeterDashboard:
                 del self.meters[meter_id]
             
             # Remove from database
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM meters_config WHERE meter_id = ?', (meter_id,))
-            conn.commit()
-            conn.close()
+            with _write_transaction(self.conn):
+                self.conn.execute('DELETE FROM meters_config WHERE meter_id = ?', (meter_id,))
+            _clear_reading_caches()
             
             return True
             
@@ -426,8 +1016,7 @@ class MultiMeterDashboard:
     def load_meters_config(self):
         """Load meters configuration from database"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
+            cursor = _db_reader(self.db_name).cursor()
             
             cursor.execute('SELECT * FROM meters_config')
             rows = cursor.fetchall()
@@ -438,125 +1027,366 @@ class MultiMeterDashboard:
                                     location=location or "", description=description or "")
                 self.meters[meter_id] = meter
             
-            conn.close()
-            
         except Exception as e:
             # Table might not exist yet
             pass
     
-    def save_reading(self, meter_id, data):
-        """Save reading for a specific meter"""
+    def _reading_row(self, meter_id, data, timestamp):
+        """Build an INSERT row in cached column order, or None if nothing is storable"""
+        # Filter out None values
+        valid_data = {k: v for k, v in data.items() if v is not None and not (isinstance(v, float) and np.isnan(v))}
+        
+        if self._db_columns.isdisjoint(valid_data):
+            return None
+        
+        values = tuple(valid_data.get(col) for col in self._column_order)
+        return (meter_id, timestamp) + values
+    
+    def save_readings_bulk(self, per_meter_data):
+        """Write readings given as {meter_id: data} or (meter_id, data) pairs in one transaction; returns rows written"""
+        if isinstance(per_meter_data, dict):
+            per_meter_data = per_meter_data.items()
+        
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            
-            # Filter out None values and add meter_id
-            valid_data = {k: v for k, v in data.items() if v is not None and not (isinstance(v, float) and np.isnan(v))}
-            valid_data['meter_id'] = meter_id
-            
-            # Get existing columns from the database
-            cursor.execute("PRAGMA table_info(pac3200_readings)")
-            existing_columns = [row[1] for row in cursor.fetchall()]
-            
-            # Filter data to only include existing columns
-            db_columns = [col for col in existing_columns if col not in ['id', 'timestamp']]
-            filtered_data = {k: v for k, v in valid_data.items() if k in db_columns}
-            
-            if not filtered_data:
-                return None
-            
-            columns = list(filtered_data.keys())
-            values = list(filtered_data.values())
-            
-            placeholders = ', '.join(['?' for _ in columns])
-            column_names = ', '.join(columns)
-            
-            query = f'''
-                INSERT INTO pac3200_readings ({column_names}) 
-                VALUES ({placeholders})
-            '''
-            
-            cursor.execute(query, values)
-            conn.commit()
-            record_id = cursor.lastrowid
-            conn.close()
-            
-            return record_id
+            timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+            rows = [self._reading_row(meter_id, data, timestamp)
+                    for meter_id, data in per_meter_data if data]
+            rows = [row for row in rows if row is not None]
             
         except Exception as e:
             st.error(f"Database save error: {e}")
-            return None
+            return 0
+        
+        if not rows:
+            return 0
+        
+        return self.flush_readings(rows)
     
-    def get_meter_readings(self, meter_id, hours=24):
-        """Get readings for a specific meter"""
+    def generate_sample_data(self, samples_per_meter=10):
+        """Write simulated readings one second apart for every meter in one batch; returns rows written"""
+        now = int(time.time())
+        rows = []
+        for meter_id, meter in self.meters.items():
+            for i in range(samples_per_meter):
+                timestamp = tsz.format_timestamp(now - (samples_per_meter - 1 - i))
+                row = self._reading_row(meter_id, meter.read_all_parameters(), timestamp)
+                if row is not None:
+                    rows.append(row)
+        
+        if not rows:
+            return 0
+        
+        return self.flush_readings(rows)
+    
+    def flush_readings(self, rows):
+        """Write reading rows in a single transaction and archive them; returns rows written"""
+        if not rows:
+            return 0
+        
         try:
-            conn = sqlite3.connect(self.db_name)
-            end_time = datetime.now()
-            start_time = end_time - timedelta(hours=hours)
-            
-            query = '''
-                SELECT * FROM pac3200_readings 
-                WHERE meter_id = ? AND timestamp BETWEEN ? AND ?
-                ORDER BY timestamp DESC
-            '''
-            
-            df = pd.read_sql_query(query, conn, params=[meter_id, start_time, end_time])
-            conn.close()
-            return df
+            with _write_transaction(self.conn):
+                self.conn.executemany(self._insert_sql, rows)
             
         except Exception as e:
-            return pd.DataFrame()
+            st.error(f"Database save error: {e}")
+            return 0
+        
+        if PARQUET_AVAILABLE:
+            self.archive_parquet(rows)
+        return len(rows)
     
-    def get_all_meters_latest(self):
-        """Get latest reading for all meters"""
+    def archive_parquet(self, rows):
+        """Append flushed rows to the hour-partitioned Parquet archive; closed hours are merged into one file"""
+        partitions = {}
+        for row in rows:
+            hour = row[1][:13].replace('-', '').replace(' ', '')
+            partitions.setdefault((row[0], hour), []).append(row)
+        
         try:
-            conn = sqlite3.connect(self.db_name)
-            
-            query = '''
-                SELECT r.*, m.name, m.location
-                FROM pac3200_readings r
-                INNER JOIN meters_config m ON r.meter_id = m.meter_id
-                INNER JOIN (
-                    SELECT meter_id, MAX(timestamp) as max_timestamp
-                    FROM pac3200_readings
-                    GROUP BY meter_id
-                ) latest ON r.meter_id = latest.meter_id AND r.timestamp = latest.max_timestamp
-                ORDER BY m.name
-            '''
-            
-            df = pd.read_sql_query(query, conn)
-            conn.close()
-            return df
+            for (meter_id, hour), part_rows in partitions.items():
+                path = os.path.join(_meter_parquet_dir(self.parquet_dir, meter_id), f"hour={hour}")
+                os.makedirs(path, exist_ok=True)
+                
+                columns = list(zip(*part_rows))
+                columns[1] = [datetime.strptime(ts, '%Y-%m-%d %H:%M:%S') for ts in columns[1]]
+                table = pa.Table.from_arrays(
+                    [pa.array(values, type=field.type) for values, field in zip(columns, self._parquet_schema)],
+                    schema=self._parquet_schema
+                )
+                
+                # Write aside and swap in, so readers never see a partial file
+                target = os.path.join(path, f"part-{time.time_ns()}.parquet")
+                pq.write_table(table, target + '.tmp', compression='zstd')
+                os.replace(target + '.tmp', target)
+            
+            # Once a meter moves on to a new hour, the hours before it are merged
+            open_hours = _archive_open_hours()
+            for meter_id in {meter_id for meter_id, _ in partitions}:
+                newest = max(hour for m, hour in partitions if m == meter_id)
+                if open_hours.get((self.parquet_dir, meter_id)) != newest:
+                    self._merge_closed_hours(meter_id, newest)
+                    open_hours[(self.parquet_dir, meter_id)] = newest
             
         except Exception as e:
-            return pd.DataFrame()
+            st.error(f"Parquet archive error: {e}")
+    
+    def _merge_closed_hours(self, meter_id, open_hour):
+        """Merge the per-flush files of every hour before open_hour into a single part.parquet"""
+        meter_dir = _meter_parquet_dir(self.parquet_dir, meter_id)
+        with _db_write_lock():
+            for entry in os.listdir(meter_dir):
+                if not entry.startswith('hour=') or entry[5:] >= open_hour:
+                    continue
+                path = os.path.join(meter_dir, entry)
+                files = sorted(f for f in os.listdir(path) if f.endswith('.parquet'))
+                if len(files) < 2:
+                    continue
+                
+                table = pa.concat_tables([pq.read_table(os.path.join(path, f), schema=self._parquet_schema)
+                                          for f in files])
+                target = os.path.join(path, 'part.parquet')
+                pq.write_table(table, target + '.tmp', compression='zstd')
+                os.replace(target + '.tmp', target)
+                for f in files:
+                    if f != 'part.parquet':
+                        os.remove(os.path.join(path, f))
     
-    def get_aggregated_data(self, hours=24):
-        """Get aggregated data from all meters"""
+    def compact_readings(self, older_than_hours=COMPACT_AFTER_HOURS, block_size=COMPACT_BLOCK_SIZE):
+        """Move full blocks of old readings into compressed storage; returns rows compacted"""
+        cutoff = tsz.format_timestamp(time.time() - older_than_hours * 3600)
+        columns = ', '.join(self._column_order)
+        compacted = 0
+        
         try:
-            conn = sqlite3.connect(self.db_name)
-            end_time = datetime.now()
-            start_time = end_time - timedelta(hours=hours)
-            
-            query = '''
-                SELECT 
-                    timestamp,
-                    SUM(Total_Active_Power) as Total_System_Power,
-                    AVG(Frequency) as Avg_Frequency,
-                    AVG(Total_Power_Factor) as Avg_Power_Factor,
-                    COUNT(DISTINCT meter_id) as Active_Meters
-                FROM pac3200_readings
-                WHERE timestamp BETWEEN ? AND ?
-                GROUP BY timestamp
-                ORDER BY timestamp DESC
-            '''
-            
-            df = pd.read_sql_query(query, conn, params=[start_time, end_time])
-            conn.close()
-            return df
+            reader = _db_reader(self.db_name)
+            meter_ids = [row[0] for row in reader.execute(
+                "SELECT DISTINCT meter_id FROM pac3200_readings WHERE timestamp < ?", (cutoff,))]
+            
+            for meter_id in meter_ids:
+                rows = reader.execute(f'''
+                    SELECT id, timestamp, {columns} FROM pac3200_readings
+                    WHERE meter_id = ? AND timestamp < ?
+                    ORDER BY timestamp
+                ''', (meter_id, cutoff)).fetchall()
+                
+                # Only full blocks are packed; the remainder waits for more data
+                for i in range(0, len(rows) - block_size + 1, block_size):
+                    block = list(zip(*rows[i:i + block_size]))
+                    timestamps = [tsz.parse_timestamp(ts) for ts in block[1]]
+                    start_ts = tsz.format_timestamp(timestamps[0])
+                    end_ts = tsz.format_timestamp(timestamps[-1])
+                    
+                    blobs = [('timestamp', tsz.encode_timestamps(timestamps))]
+                    blobs += [(col, tsz.encode_floats(values))
+                              for col, values in zip(self._column_order, block[2:])]
+                    
+                    with _write_transaction(self.conn):
+                        self.conn.executemany('''
+                            INSERT INTO pac3200_blocks (meter_id, start_ts, end_ts, column_name, compressed_data)
+                            VALUES (?, ?, ?, ?, ?)
+                        ''', [(meter_id, start_ts, end_ts, col, blob) for col, blob in blobs])
+                        self.conn.executemany("DELETE FROM pac3200_readings WHERE id = ?",
+                                              [(row_id,) for row_id in block[0]])
+                    compacted += block_size
             
         except Exception as e:
+            st.error(f"Compaction error: {e}")
+        
+        # Compacted rows left the readings table, so cached results are stale
+        if compacted:
+            _clear_reading_caches()
+        return compacted
+    
+    def get_compressed_readings(self, meter_id=None, start_time=None, end_time=None, limit=None):
+        """Expand compressed blocks overlapping a UTC time window back into rows; limit keeps only the newest blocks"""
+        where = "WHERE 1 = 1"
+        params = []
+        if meter_id is not None:
+            where += " AND meter_id = ?"
+            params.append(meter_id)
+        if start_time is not None:
+            where += " AND end_ts >= ?"
+            params.append(start_time)
+        if end_time is not None:
+            where += " AND start_ts <= ?"
+            params.append(end_time)
+        
+        query = f"SELECT id, meter_id, start_ts, column_name, compressed_data FROM pac3200_blocks {where}"
+        if limit is not None:
+            # Pick the newest block keys first so only those blobs are fetched and decoded
+            query += f''' AND (meter_id, start_ts) IN (
+                SELECT meter_id, start_ts FROM pac3200_blocks {where} AND column_name = 'timestamp'
+                ORDER BY start_ts DESC LIMIT ?)'''
+            params = params * 2 + [limit]
+        
+        blocks = {}
+        for _, block_meter, start_ts, column_name, blob in _db_reader(self.db_name).execute(query + " ORDER BY id", params):
+            blocks.setdefault((block_meter, start_ts), {})[column_name] = blob
+        
+        frames = []
+        for (block_meter, _), blobs in blocks.items():
+            data = {'meter_id': block_meter,
+                    'timestamp': [tsz.format_timestamp(ts) for ts in tsz.decode_timestamps(blobs.pop('timestamp'))]}
+            data.update({col: tsz.decode_floats(blob) for col, blob in blobs.items()})
+            frames.append(pd.DataFrame(data))
+        
+        if not frames:
             return pd.DataFrame()
+        
+        df = pd.concat(frames, ignore_index=True)
+        if start_time is not None:
+            df = df[df['timestamp'] >= start_time]
+        if end_time is not None:
+            df = df[df['timestamp'] <= end_time]
+        return df
+    
+    def export_raw_csv(self):
+        """Stream every stored reading, including compressed blocks, into CSV bytes"""
+        buf = io.BytesIO()
+        text = io.TextIOWrapper(buf, encoding='utf-8', newline='')
+        writer = csv.writer(text)
+        
+        cursor = _db_reader(self.db_name).execute("SELECT * FROM pac3200_readings ORDER BY timestamp DESC")
+        header = [col[0] for col in cursor.description]
+        writer.writerow(header)
+        while True:
+            rows = cursor.fetchmany(CSV_CHUNK_ROWS)
+            if not rows:
+                break
+            writer.writerows(rows)
+        
+        # Include readings that were moved into compressed blocks
+        archived = self.get_compressed_readings()
+        if not archived.empty:
+            archived.reindex(columns=header).to_csv(text, header=False, index=False, chunksize=CSV_CHUNK_ROWS)
+        
+        text.flush()
+        return buf.getvalue()
+    
+    def get_db_version(self):
+        """Return a cache key that changes on every insert or delete"""
+        # The reader's data_version moves whenever any other connection, including our writer, commits
+        try:
+            return _db_reader(self.db_name).execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+    
+    def get_meter_readings(self, meter_id, hours=24, columns=None):
+        """Get readings for a specific meter; columns=None returns every column"""
+        if columns is not None:
+            columns = tuple(columns)
+            if not self._db_columns.issuperset(columns):
+                return pd.DataFrame()
+        return _load_meter_readings(self.db_name, meter_id, hours, self.get_db_version(), columns)
+    
+    def get_named_readings(self, meter_ids=None, hours=24):
+        """Get readings for several meters (None for all) with a meter_name column"""
+        if meter_ids is not None:
+            meter_ids = tuple(meter_ids)
+            if not meter_ids:
+                return pd.DataFrame()
+        return _load_named_readings(self.db_name, meter_ids, hours, self.get_db_version())
+    
+    def get_all_meters_latest(self, columns=None):
+        """Get latest reading for all meters; columns=None returns every column"""
+        if columns is not None:
+            columns = tuple(columns)
+        return _load_all_meters_latest(self.db_name, columns, self.get_db_version())
+    
+    def get_system_stats(self, hours=24):
+        """Get system energy, power factor and demand statistics as a dict, or None without data"""
+        df = _load_system_stats(self.db_name, hours, self.get_db_version())
+        if df.empty or not df['Readings'].iloc[0]:
+            return None
+        return df.iloc[0].fillna(0).to_dict()
+
+def _read_meters_serially(dashboard, meter_ids):
+    """Read meters that share one Modbus client, one after another"""
+    results = {}
+    for meter_id in meter_ids:
+        try:
+            results[meter_id] = dashboard.meters[meter_id].read_all_parameters()
+        except Exception as e:
+            results[meter_id] = None
+    return results
+
+def poll_meters_threaded(dashboard, meter_ids):
+    """Poll meters from a thread pool with blocking clients and return (meter_id, data) pairs"""
+    # Meters behind the same gateway share a client, so each worker owns one endpoint
+    groups = {}
+    for meter_id in meter_ids:
+        meter = dashboard.meters[meter_id]
+        groups.setdefault((meter.host, meter.port), []).append(meter_id)
+    
+    results = []
+    with ThreadPoolExecutor(max_workers=min(MAX_POLL_WORKERS, len(groups))) as pool:
+        futures = [pool.submit(_read_meters_serially, dashboard, group) for group in groups.values()]
+        for future in as_completed(futures):
+            results.extend(future.result().items())
+    
+    return results
+
+def _alert_lines(latest_df, mask, label, column, fmt):
+    """Format one alert line per meter selected by a boolean mask"""
+    flagged = latest_df.loc[mask.fillna(False), ['name', column]]
+    return ("⚠️ " + label + " on " + flagged['name'].astype(str) + ": "
+            + flagged[column].map(fmt.format).astype(str)).tolist()
+
+def build_system_alerts(latest_df):
+    """Alert messages for the latest readings: low PF, frequency deviation and high THD"""
+    if latest_df.empty:
+        return []
+    
+    # Check for power factor issues
+    alerts = _alert_lines(latest_df, latest_df['Total_Power_Factor'] < 0.85,
+                          "Low power factor", 'Total_Power_Factor', '{:.3f}')
+    
+    # Check for frequency deviations
+    frequency = latest_df['Frequency']
+    alerts += _alert_lines(latest_df, (frequency < 49.5) | (frequency > 50.5),
+                           "Frequency deviation", 'Frequency', '{:.2f} Hz')
+    
+    # Check for high THD
+    for col in ['THD_R_Voltage_1', 'THD_R_Current_1']:
+        if col in latest_df.columns:
+            alerts += _alert_lines(latest_df, latest_df[col] > 5,
+                                   f"High {col.replace('_', ' ')}", col, '{:.2f}%')
+    
+    return alerts
+
+def _csv_bytes(df):
+    """Encode a DataFrame as CSV bytes, formatting it in chunks"""
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False, chunksize=CSV_CHUNK_ROWS)
+    return buf.getvalue()
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def build_raw_export_csv(_dashboard, db_name, db_version):
+    """Full raw CSV export, rebuilt only when the database changes rather than on every rerun"""
+    return _dashboard.export_raw_csv()
+
+def poll_meters(dashboard, meter_ids):
+    """Poll the given meters concurrently over their pooled clients, one worker per endpoint"""
+    if not meter_ids:
+        return {}
+    return poll_meters_threaded(dashboard, meter_ids)
+
+def _collect(dashboard, meter_ids):
+    """Read the given meters in parallel, save them in one batch and report the outcome"""
+    meter_ids = [meter_id for meter_id in meter_ids if meter_id in dashboard.meters]
+    readable = [meter_id for meter_id in meter_ids
+                if dashboard.meters[meter_id].connected or not MODBUS_AVAILABLE]
+    failed = len(meter_ids) - len(readable)
+    
+    with st.spinner(f"Reading {len(readable)} meter(s)..."):
+        results = poll_meters(dashboard, readable)
+        collected = dashboard.save_readings_bulk(results)
+    failed += len(results) - collected
+    
+    if collected > 0:
+        st.sidebar.success(f"✅ Collected data from {collected} meter(s)")
+    if failed > 0:
+        st.sidebar.warning(f"⚠️ Failed to collect from {failed} meter(s)")
 
 def create_meter_overview_card(meter, latest_data):
     """Create an overview card for a single meter"""
@@ -611,27 +1441,82 @@ def create_meter_overview_card(meter, latest_data):
             pf = pf if pf and not pd.isna(pf) else 0
             st.metric("PF", f"{pf:.2f}")
 
-def create_comparison_chart(dashboard, meter_ids, parameter, hours=24):
-    """Create comparison chart for multiple meters"""
+def _meter_card(meter_id):
+    """Overview card for one meter, refreshed with the overview section"""
+    dashboard = st.session_state.dashboard
+    if meter_id not in dashboard.meters:
+        return
+    
+    latest_df = dashboard.get_all_meters_latest(LATEST_SUMMARY_COLUMNS)
+    rows = latest_df[latest_df['meter_id'] == meter_id] if not latest_df.empty else latest_df
+    latest_data = rows.iloc[0] if not rows.empty else {}
+    create_meter_overview_card(dashboard.meters[meter_id], latest_data)
+
+def _lttb(x, y, n=MAX_PLOT_POINTS):
+    """Indices of the n points kept by Largest-Triangle-Three-Buckets downsampling"""
+    size = len(y)
+    if size <= n or n < 3:
+        return np.arange(size)
+    
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    
+    # First and last points are always kept; the rest is split into n - 2 buckets
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    keep = np.empty(n, dtype=np.int64)
+    keep[0], keep[-1] = 0, size - 1
+    
+    a = 0
+    for i in range(n - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else size
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        
+        # Keep the point forming the largest triangle with the last kept point and the next bucket's mean
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+    
+    return keep
+
+def _downsample(timestamps, values):
+    """LTTB-downsample one trace, dropping missing values; returns (x, y)"""
+    values = pd.Series(values, dtype='float64').reset_index(drop=True)
+    timestamps = pd.Series(timestamps).reset_index(drop=True)
+    valid = values.notna().to_numpy()
+    timestamps, values = timestamps[valid], values[valid]
+    
+    keep = _lttb(timestamps.to_numpy(dtype='datetime64[ns]').astype(np.int64), values.to_numpy(), MAX_PLOT_POINTS)
+    return timestamps.iloc[keep], values.iloc[keep]
+
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=READ_CACHE_MAX_ENTRIES, show_spinner=False)
+def build_comparison_fig(db_name, parquet_dir, meter_ids, meter_names, parameter, hours, db_version):
+    """Build the comparison chart once per data version and return it as a figure dict"""
     fig = go.Figure()
     
     colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD']
     
-    for i, meter_id in enumerate(meter_ids):
-        df = dashboard.get_meter_readings(meter_id, hours)
+    traces = []
+    for i, (meter_id, meter_name) in enumerate(zip(meter_ids, meter_names)):
+        df = _parameter_history(db_name, parquet_dir, meter_id, parameter, hours, db_version)
         if not df.empty and parameter in df.columns:
-            meter_name = dashboard.meters[meter_id].name if meter_id in dashboard.meters else meter_id
+            # More points than screen pixels only costs serialization time
+            x, y = _downsample(pd.to_datetime(df['timestamp']), df[parameter])
             
-            fig.add_trace(go.Scatter(
-                x=pd.to_datetime(df['timestamp']),
-                y=df[parameter],
+            traces.append(go.Scattergl(
+                x=x,
+                y=y,
                 mode='lines+markers',
                 name=meter_name,
                 line=dict(width=2, color=colors[i % len(colors)]),
                 marker=dict(size=4)
             ))
+    fig.add_traces(traces)
     
     fig.update_layout(
+        # Keep the user's zoom when the figure is rebuilt with new data
+        uirevision=f'comparison-{parameter}',
         title=f'{parameter.replace("_", " ")} Comparison',
         xaxis_title='Time',
         yaxis_title=parameter.replace("_", " "),
@@ -640,9 +1525,247 @@ def create_comparison_chart(dashboard, meter_ids, parameter, hours=24):
         showlegend=True
     )
     
-    return fig
+    return fig.to_dict()
+
+def create_comparison_chart(dashboard, meter_ids, parameter, hours=24):
+    """Create comparison chart for multiple meters"""
+    meter_names = tuple(dashboard.meters[meter_id].name if meter_id in dashboard.meters else meter_id
+                        for meter_id in meter_ids)
+    
+    fig_dict = build_comparison_fig(dashboard.db_name, dashboard.parquet_dir, tuple(meter_ids),
+                                    meter_names, parameter, hours, dashboard.get_db_version())
+    return go.Figure(fig_dict)
+
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=READ_CACHE_MAX_ENTRIES, show_spinner=False)
+def build_power_pie_fig(db_name, db_version):
+    """Build the power distribution pie from the latest readings as a figure dict"""
+    latest_df = _load_all_meters_latest(db_name, LATEST_SUMMARY_COLUMNS, db_version)
+    
+    fig = go.Figure(data=[go.Pie(
+        labels=latest_df['name'].tolist() if not latest_df.empty else [],
+        values=latest_df['Total_Active_Power'].tolist() if not latest_df.empty else [],
+        hole=0.4
+    )])
+    fig.update_layout(
+        title="Power Distribution by Meter",
+        height=400
+    )
+    
+    return fig.to_dict()
+
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=READ_CACHE_MAX_ENTRIES, show_spinner=False)
+def build_system_trend_fig(db_name, hours, db_version, bucket_seconds=60):
+    """Build the system power trend as a figure dict, or None without data"""
+    agg_df = _load_aggregated_data(db_name, hours, bucket_seconds, db_version)
+    if agg_df.empty:
+        return None
+    
+    x, y = _downsample(pd.to_datetime(agg_df['timestamp']), agg_df['Total_System_Power'])
+    
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(
+        x=x,
+        y=y,
+        mode='lines+markers',
+        name='Total System Power',
+        line=dict(width=3, color='#FF6B6B')
+    ))
+    fig.update_layout(
+        uirevision='system-trend',
+        title="System Power Trend",
+        xaxis_title="Time",
+        yaxis_title="Power (W)",
+        height=400
+    )
+    
+    return fig.to_dict()
+
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=READ_CACHE_MAX_ENTRIES, show_spinner=False)
+def build_meter_trend_figs(db_name, meter_id, hours, db_version):
+    """Build one meter's voltage and power trends as figure dicts; power is None if not recorded"""
+    df = _load_meter_readings(db_name, meter_id, hours, db_version, METER_DETAIL_COLUMNS)
+    timestamps = pd.to_datetime(df['timestamp']) if 'timestamp' in df.columns else []
+    
+    fig_voltage = go.Figure()
+    fig_voltage.add_traces([
+        go.Scattergl(
+            x=x,
+            y=y,
+            mode='lines',
+            name=phase.replace('_', ' ')
+        )
+        for phase in ['V1_N_Voltage', 'V2_N_Voltage', 'V3_N_Voltage'] if phase in df.columns
+        for x, y in [_downsample(timestamps, df[phase])]
+    ])
+    fig_voltage.update_layout(
+        # Keep the user's zoom when the figure is rebuilt with new data
+        uirevision=f'voltage-{meter_id}',
+        title="Voltage Trends",
+        xaxis_title="Time",
+        yaxis_title="Voltage (V)",
+        height=400
+    )
+    
+    if 'Total_Active_Power' not in df.columns:
+        return fig_voltage.to_dict(), None
+    
+    fig_power = go.Figure()
+    x, y = _downsample(timestamps, df['Total_Active_Power'])
+    fig_power.add_trace(go.Scattergl(
+        x=x,
+        y=y,
+        mode='lines+markers',
+        name='Total Active Power',
+        line=dict(width=3, color='#FF6B6B')
+    ))
+    fig_power.update_layout(
+        uirevision=f'power-{meter_id}',
+        title="Power Consumption",
+        xaxis_title="Time",
+        yaxis_title="Power (W)",
+        height=400
+    )
+    
+    return fig_voltage.to_dict(), fig_power.to_dict()
+
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=READ_CACHE_MAX_ENTRIES, show_spinner=False)
+def build_hourly_load_fig(db_name, hours, db_version):
+    """Build the hourly load bar chart as a figure dict"""
+    hourly_data = _load_hourly_system_power(db_name, hours, db_version)
+    
+    fig = go.Figure()
+    if not hourly_data.empty:
+        fig.add_trace(go.Bar(
+            x=hourly_data['timestamp'],
+            y=hourly_data['Total_Active_Power'],
+            marker_color='#4ECDC4'
+        ))
+    fig.update_layout(
+        title="Hourly Energy Consumption",
+        xaxis_title="Time",
+        yaxis_title="Energy (Wh)",
+        height=400
+    )
+    
+    return fig.to_dict()
+
+@fragment
+def _comparison(hours):
+    """Comparison tab body; its widgets rerun only this section"""
+    dashboard = st.session_state.dashboard
+    
+    # Select meters to compare
+    compare_meters = st.multiselect(
+        "Select meters to compare",
+        options=list(dashboard.meters.keys()),
+        format_func=lambda x: dashboard.meters[x].name,
+        default=list(dashboard.meters.keys())[:min(3, len(dashboard.meters))]
+    )
+    
+    if compare_meters:
+        # Select parameter to compare
+        param_groups = {
+            "Power": ['Total_Active_Power', 'Total_Reactive_Power', 'Total_Apparent_Power'],
+            "Voltage": ['V1_N_Voltage', 'V2_N_Voltage', 'V3_N_Voltage', 'Average_Voltage_Vph_n'],
+            "Current": ['L1_Current', 'L2_Current', 'L3_Current', 'Average_Current'],
+            "Power Factor": ['Total_Power_Factor', 'L1_Power_Factor', 'L2_Power_Factor', 'L3_Power_Factor'],
+            "Energy": ['Total_Active_Energy', 'Total_Reactive_Energy'],
+            "Quality": ['Frequency', 'THD_R_Voltage_1', 'THD_R_Current_1']
+        }
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            param_group = st.selectbox("Parameter Group", list(param_groups.keys()))
+        with col2:
+            parameter = st.selectbox("Parameter", param_groups[param_group])
+        
+        # Create comparison chart
+        fig = create_comparison_chart(dashboard, compare_meters, parameter, hours)
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Comparison table
+        st.subheader("Current Values Comparison")
+        comparison_data = []
+        
+        for meter_id in compare_meters:
+            df = dashboard.get_meter_readings(meter_id, hours, [parameter])
+            if not df.empty:
+                latest = df.iloc[0]
+                comparison_data.append({
+                    'Meter': dashboard.meters[meter_id].name,
+                    'Location': dashboard.meters[meter_id].location,
+                    parameter: latest.get(parameter, 0)
+                })
+        
+        if comparison_data:
+            comparison_df = pd.DataFrame(comparison_data)
+            st.dataframe(comparison_df, use_container_width=True, hide_index=True)
+
+def _overview(hours):
+    """Overview tab body; reruns on its own when auto refresh is on"""
+    dashboard = st.session_state.dashboard
+    
+    # Get latest data for all meters
+    latest_df = dashboard.get_all_meters_latest(LATEST_SUMMARY_COLUMNS)
+    
+    if not latest_df.empty:
+        # System-wide metrics
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            total_power = latest_df['Total_Active_Power'].sum()
+            st.metric("Total System Power", f"{total_power:.1f} W")
+        
+        with col2:
+            avg_frequency = latest_df['Frequency'].mean()
+            st.metric("Average Frequency", f"{avg_frequency:.2f} Hz")
+        
+        with col3:
+            avg_pf = latest_df['Total_Power_Factor'].mean()
+            st.metric("Average Power Factor", f"{avg_pf:.3f}")
+        
+        with col4:
+            connected_count = sum(1 for m in dashboard.meters.values() if m.connected)
+            st.metric("Connected Meters", f"{connected_count}/{len(dashboard.meters)}")
+        
+        st.markdown("---")
+        
+        # Meter overview cards
+        st.subheader("Meter Status")
+        
+        for meter_id in latest_df['meter_id']:
+            if meter_id in dashboard.meters:
+                _meter_card(meter_id)
+                st.markdown("---")
+        
+        # System power distribution pie chart
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            fig_pie = build_power_pie_fig(dashboard.db_name, dashboard.get_db_version())
+            st.plotly_chart(go.Figure(fig_pie), use_container_width=True)
+        
+        with col2:
+            # Aggregated trends
+            fig_trend = build_system_trend_fig(dashboard.db_name, hours, dashboard.get_db_version())
+            if fig_trend is not None:
+                st.plotly_chart(go.Figure(fig_trend), use_container_width=True)
+    else:
+        st.warning("No data available. Collect some readings first.")
 
 def main():
+    # Set page configuration
+    st.set_page_config(
+        page_title="Multi-Meter PAC3200 Monitor",
+        page_icon="⚡",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    _inject_css()
+    
+    if not MODBUS_AVAILABLE:
+        st.warning("⚠️ PyModbus not installed. Running in demo mode with simulated data.\n\nTo install: `pip install pymodbus`")
+    
     st.title("⚡ Multi-Meter PAC3200 Energy Monitoring Dashboard")
     st.markdown("---")
     
@@ -669,13 +1792,12 @@ def main():
                         meter.disconnect()
                     
                     # Drop and recreate tables
-                    conn = sqlite3.connect(dashboard.db_name)
-                    cursor = conn.cursor()
-                    cursor.execute("DROP TABLE IF EXISTS pac3200_readings")
-                    cursor.execute("DROP TABLE IF EXISTS pac3200_readings_backup")
-                    cursor.execute("DROP TABLE IF EXISTS meters_config")
-                    conn.commit()
-                    conn.close()
+                    conn = dashboard.conn
+                    with _write_transaction(conn):
+                        conn.execute("DROP TABLE IF EXISTS pac3200_readings")
+                        conn.execute("DROP TABLE IF EXISTS pac3200_readings_backup")
+                        conn.execute("DROP TABLE IF EXISTS pac3200_blocks")
+                        conn.execute("DROP TABLE IF EXISTS meters_config")
                     
                     # Reinitialize
                     dashboard.init_database()
@@ -687,10 +1809,13 @@ def main():
                 except Exception as e:
                     st.error(f"Error resetting database: {e}")
         
+        if st.button("🗜️ Compact Old Readings", help=f"Compress readings older than {COMPACT_AFTER_HOURS} hours"):
+            compacted = dashboard.compact_readings()
+            st.success(f"✅ Compacted {compacted} reading(s)")
+        
         if st.button("🔍 Check Database Schema"):
             try:
-                conn = sqlite3.connect(dashboard.db_name)
-                cursor = conn.cursor()
+                cursor = _db_reader(dashboard.db_name).cursor()
                 
                 # Check tables
                 cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
@@ -702,8 +1827,6 @@ def main():
                 columns = cursor.fetchall()
                 important_cols = [col[1] for col in columns if col[1] in ['meter_id', 'device_id', 'timestamp']]
                 st.info(f"Key columns: {important_cols}")
-                
-                conn.close()
             except Exception as e:
                 st.error(f"Error checking schema: {e}")
     
@@ -728,52 +1851,61 @@ def main():
     # List existing meters
     st.sidebar.markdown("### 📊 Configured Meters")
     
+    selected_meters = []
     if dashboard.meters:
-        for meter_id, meter in dashboard.meters.items():
-            with st.sidebar.container():
-                col1, col2, col3 = st.sidebar.columns([1, 1, 1])
-                
-                with col1:
-                    # Checkbox for selection
-                    selected = st.checkbox(meter.name, key=f"select_{meter_id}", 
-                                           value=meter_id in st.session_state.selected_meters)
-                    if selected and meter_id not in st.session_state.selected_meters:
-                        st.session_state.selected_meters.append(meter_id)
-                    elif not selected and meter_id in st.session_state.selected_meters:
-                        st.session_state.selected_meters.remove(meter_id)
-                
-                with col2:
-                    # Connect/Disconnect button
-                    if meter.connected:
-                        if st.button("🔌", key=f"disconnect_{meter_id}", help="Disconnect"):
-                            meter.disconnect()
-                            st.rerun()
+        # One editable table instead of a row of widgets per meter
+        meter_table = pd.DataFrame({
+            'Select': False,
+            'Meter': [meter.name for meter in dashboard.meters.values()],
+            'Status': ["🟢" if meter.connected else "🔴" for meter in dashboard.meters.values()],
+            'Endpoint': [f"{meter.host}:{meter.port} (Unit {meter.unit_id})" for meter in dashboard.meters.values()],
+            'Location': [meter.location for meter in dashboard.meters.values()],
+        }, index=list(dashboard.meters.keys()))
+        
+        # Edits are stored by row position, so start fresh when the meter list changes
+        edited = st.sidebar.data_editor(
+            meter_table,
+            key=f"meter_table_{'|'.join(dashboard.meters.keys())}",
+            hide_index=True,
+            use_container_width=True,
+            disabled=['Meter', 'Status', 'Endpoint', 'Location'],
+            column_config={
+                'Select': st.column_config.CheckboxColumn("✓", width="small"),
+                'Status': st.column_config.TextColumn("", width="small"),
+            },
+        )
+        selected_meters = edited.index[edited['Select']].tolist()
+        
+        col1, col2, col3 = st.sidebar.columns(3)
+        
+        with col1:
+            if st.button("🔗", key="connect_selected", help="Connect selected", disabled=not selected_meters):
+                for meter_id in selected_meters:
+                    meter = dashboard.meters[meter_id]
+                    if meter.connect():
+                        st.sidebar.success(f"Connected to {meter.name}")
                     else:
-                        if st.button("🔗", key=f"connect_{meter_id}", help="Connect"):
-                            if meter.connect():
-                                st.success(f"Connected to {meter.name}")
-                            else:
-                                st.error(f"Failed to connect to {meter.name}")
-                            st.rerun()
-                
-                with col3:
-                    # Remove button
-                    if st.button("🗑️", key=f"remove_{meter_id}", help="Remove meter"):
-                        if dashboard.remove_meter(meter_id):
-                            st.success(f"Removed {meter.name}")
-                            if meter_id in st.session_state.selected_meters:
-                                st.session_state.selected_meters.remove(meter_id)
-                            st.rerun()
-                
-                # Show meter details
-                st.sidebar.caption(f"📡 {meter.host}:{meter.port} (Unit {meter.unit_id})")
-                if meter.location:
-                    st.sidebar.caption(f"📍 {meter.location}")
-                
-                st.sidebar.markdown("---")
+                        st.sidebar.error(f"Failed to connect to {meter.name}")
+                st.rerun()
+        
+        with col2:
+            if st.button("🔌", key="disconnect_selected", help="Disconnect selected", disabled=not selected_meters):
+                for meter_id in selected_meters:
+                    dashboard.meters[meter_id].disconnect()
+                st.rerun()
+        
+        with col3:
+            if st.button("🗑️", key="remove_selected", help="Remove selected", disabled=not selected_meters):
+                for meter_id in selected_meters:
+                    name = dashboard.meters[meter_id].name
+                    if dashboard.remove_meter(meter_id):
+                        st.sidebar.success(f"Removed {name}")
+                st.rerun()
     else:
         st.sidebar.info("No meters configured. Add a meter to get started.")
     
+    st.session_state.selected_meters = selected_meters
+    
     # Data collection controls
     st.sidebar.markdown("### 📊 Data Collection")
     
@@ -781,58 +1913,12 @@ def main():
     
     with col1:
         if st.button("📥 Collect All", disabled=not dashboard.meters):
-            collected = 0
-            failed = 0
-            
-            for meter_id, meter in dashboard.meters.items():
-                if meter.connected or not MODBUS_AVAILABLE:
-                    with st.spinner(f"Reading {meter.name}..."):
-                        data = meter.read_all_parameters()
-                        if data:
-                            record_id = dashboard.save_reading(meter_id, data)
-                            if record_id:
-                                collected += 1
-                            else:
-                                failed += 1
-                        else:
-                            failed += 1
-                else:
-                    failed += 1
-            
-            if collected > 0:
-                st.sidebar.success(f"✅ Collected data from {collected} meter(s)")
-            if failed > 0:
-                st.sidebar.warning(f"⚠️ Failed to collect from {failed} meter(s)")
-            
+            _collect(dashboard, list(dashboard.meters.keys()))
             st.rerun()
     
     with col2:
         if st.button("📥 Collect Selected", disabled=not st.session_state.selected_meters):
-            collected = 0
-            failed = 0
-            
-            for meter_id in st.session_state.selected_meters:
-                if meter_id in dashboard.meters:
-                    meter = dashboard.meters[meter_id]
-                    if meter.connected or not MODBUS_AVAILABLE:
-                        with st.spinner(f"Reading {meter.name}..."):
-                            data = meter.read_all_parameters()
-                            if data:
-                                record_id = dashboard.save_reading(meter_id, data)
-                                if record_id:
-                                    collected += 1
-                                else:
-                                    failed += 1
-                            else:
-                                failed += 1
-                    else:
-                        failed += 1
-            
-            if collected > 0:
-                st.sidebar.success(f"✅ Collected data from {collected} meter(s)")
-            if failed > 0:
-                st.sidebar.warning(f"⚠️ Failed to collect from {failed} meter(s)")
-            
+            _collect(dashboard, st.session_state.selected_meters)
             st.rerun()
     
     # Auto refresh
@@ -842,11 +1928,7 @@ def main():
     if not MODBUS_AVAILABLE:
         if st.sidebar.button("🎲 Generate Sample Data"):
             with st.spinner("Generating sample data..."):
-                for meter_id, meter in dashboard.meters.items():
-                    for i in range(10):
-                        data = meter.read_all_parameters()
-                        dashboard.save_reading(meter_id, data)
-                        time.sleep(0.1)
+                dashboard.generate_sample_data()
                 st.sidebar.success("Sample data generated!")
                 st.rerun()
     
@@ -879,77 +1961,8 @@ def main():
     with tab1:
         st.header("System Overview")
         
-        # Get latest data for all meters
-        latest_df = dashboard.get_all_meters_latest()
-        
-        if not latest_df.empty:
-            # System-wide metrics
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                total_power = latest_df['Total_Active_Power'].sum()
-                st.metric("Total System Power", f"{total_power:.1f} W")
-            
-            with col2:
-                avg_frequency = latest_df['Frequency'].mean()
-                st.metric("Average Frequency", f"{avg_frequency:.2f} Hz")
-            
-            with col3:
-                avg_pf = latest_df['Total_Power_Factor'].mean()
-                st.metric("Average Power Factor", f"{avg_pf:.3f}")
-            
-            with col4:
-                connected_count = sum(1 for m in dashboard.meters.values() if m.connected)
-                st.metric("Connected Meters", f"{connected_count}/{len(dashboard.meters)}")
-            
-            st.markdown("---")
-            
-            # Meter overview cards
-            st.subheader("Meter Status")
-            
-            for _, row in latest_df.iterrows():
-                meter_id = row['meter_id']
-                if meter_id in dashboard.meters:
-                    meter = dashboard.meters[meter_id]
-                    create_meter_overview_card(meter, row)
-                    st.markdown("---")
-            
-            # System power distribution pie chart
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                fig_pie = go.Figure(data=[go.Pie(
-                    labels=latest_df['name'].tolist(),
-                    values=latest_df['Total_Active_Power'].tolist(),
-                    hole=0.4
-                )])
-                fig_pie.update_layout(
-                    title="Power Distribution by Meter",
-                    height=400
-                )
-                st.plotly_chart(fig_pie, use_container_width=True)
-            
-            with col2:
-                # Aggregated trends
-                agg_df = dashboard.get_aggregated_data(hours)
-                if not agg_df.empty:
-                    fig_trend = go.Figure()
-                    fig_trend.add_trace(go.Scatter(
-                        x=pd.to_datetime(agg_df['timestamp']),
-                        y=agg_df['Total_System_Power'],
-                        mode='lines+markers',
-                        name='Total System Power',
-                        line=dict(width=3, color='#FF6B6B')
-                    ))
-                    fig_trend.update_layout(
-                        title="System Power Trend",
-                        xaxis_title="Time",
-                        yaxis_title="Power (W)",
-                        height=400
-                    )
-                    st.plotly_chart(fig_trend, use_container_width=True)
-        else:
-            st.warning("No data available. Collect some readings first.")
+        run_every = AUTO_REFRESH_SECONDS if st.session_state.auto_refresh else None
+        fragment(run_every=run_every)(_overview)(hours)
     
     with tab2:
         st.header("Individual Meter Analysis")
@@ -963,7 +1976,7 @@ def main():
             
             if selected_meter:
                 meter = dashboard.meters[selected_meter]
-                df = dashboard.get_meter_readings(selected_meter, hours)
+                df = dashboard.get_meter_readings(selected_meter, hours, METER_DETAIL_COLUMNS)
                 
                 if not df.empty:
                     # Meter information
@@ -978,91 +1991,40 @@ def main():
                     
                     # Latest readings
                     st.subheader("Current Readings")
-                    latest = df.iloc[0]
+                    latest = df.iloc[0].fillna(0)
                     
                     col1, col2, col3, col4 = st.columns(4)
                     
                     with col1:
-                        # Safe value extraction with null checking
-                        total_power = latest.get('Total_Active_Power', 0)
-                        total_power = total_power if total_power and not pd.isna(total_power) else 0
-                        frequency = latest.get('Frequency', 0)
-                        frequency = frequency if frequency and not pd.isna(frequency) else 0
-                        
-                        st.metric("Total Power", f"{total_power:.1f} W")
-                        st.metric("Frequency", f"{frequency:.2f} Hz")
+                        st.metric("Total Power", f"{latest.get('Total_Active_Power', 0):.1f} W")
+                        st.metric("Frequency", f"{latest.get('Frequency', 0):.2f} Hz")
                     
                     with col2:
-                        v1 = latest.get('V1_N_Voltage', 0)
-                        v1 = v1 if v1 and not pd.isna(v1) else 0
-                        v2 = latest.get('V2_N_Voltage', 0)
-                        v2 = v2 if v2 and not pd.isna(v2) else 0
-                        v3 = latest.get('V3_N_Voltage', 0)
-                        v3 = v3 if v3 and not pd.isna(v3) else 0
-                        
-                        st.metric("V1 Voltage", f"{v1:.1f} V")
-                        st.metric("V2 Voltage", f"{v2:.1f} V")
-                        st.metric("V3 Voltage", f"{v3:.1f} V")
+                        st.metric("V1 Voltage", f"{latest.get('V1_N_Voltage', 0):.1f} V")
+                        st.metric("V2 Voltage", f"{latest.get('V2_N_Voltage', 0):.1f} V")
+                        st.metric("V3 Voltage", f"{latest.get('V3_N_Voltage', 0):.1f} V")
                     
                     with col3:
-                        l1 = latest.get('L1_Current', 0)
-                        l1 = l1 if l1 and not pd.isna(l1) else 0
-                        l2 = latest.get('L2_Current', 0)
-                        l2 = l2 if l2 and not pd.isna(l2) else 0
-                        l3 = latest.get('L3_Current', 0)
-                        l3 = l3 if l3 and not pd.isna(l3) else 0
-                        
-                        st.metric("L1 Current", f"{l1:.2f} A")
-                        st.metric("L2 Current", f"{l2:.2f} A")
-                        st.metric("L3 Current", f"{l3:.2f} A")
+                        st.metric("L1 Current", f"{latest.get('L1_Current', 0):.2f} A")
+                        st.metric("L2 Current", f"{latest.get('L2_Current', 0):.2f} A")
+                        st.metric("L3 Current", f"{latest.get('L3_Current', 0):.2f} A")
                     
                     with col4:
-                        pf = latest.get('Total_Power_Factor', 0)
-                        pf = pf if pf and not pd.isna(pf) else 0
-                        energy = latest.get('Total_Active_Energy', 0)
-                        energy = energy if energy and not pd.isna(energy) else 0
-                        
-                        st.metric("Power Factor", f"{pf:.3f}")
-                        st.metric("Total Energy", f"{energy:.0f} Wh")
+                        st.metric("Power Factor", f"{latest.get('Total_Power_Factor', 0):.3f}")
+                        st.metric("Total Energy", f"{latest.get('Total_Active_Energy', 0):.0f} Wh")
                     
                     # Trends
                     st.subheader("Trends")
                     
+                    fig_voltage, fig_power = build_meter_trend_figs(dashboard.db_name, selected_meter, hours,
+                                                                    dashboard.get_db_version())
+                    
                     # Voltage trend
-                    fig_voltage = go.Figure()
-                    for phase in ['V1_N_Voltage', 'V2_N_Voltage', 'V3_N_Voltage']:
-                        if phase in df.columns:
-                            fig_voltage.add_trace(go.Scatter(
-                                x=pd.to_datetime(df['timestamp']),
-                                y=df[phase],
-                                mode='lines',
-                                name=phase.replace('_', ' ')
-                            ))
-                    fig_voltage.update_layout(
-                        title="Voltage Trends",
-                        xaxis_title="Time",
-                        yaxis_title="Voltage (V)",
-                        height=400
-                    )
-                    st.plotly_chart(fig_voltage, use_container_width=True)
+                    st.plotly_chart(go.Figure(fig_voltage), use_container_width=True)
                     
                     # Power trend
-                    if 'Total_Active_Power' in df.columns:
-                        fig_power = go.Figure()
-                        fig_power.add_trace(go.Scatter(
-                            x=pd.to_datetime(df['timestamp']),
-                            y=df['Total_Active_Power'],
-                            mode='lines+markers',
-                            name='Total Active Power',
-                            line=dict(width=3, color='#FF6B6B')
-                        ))
-                        fig_power.update_layout(
-                            title="Power Consumption",
-                            xaxis_title="Time",
-                            yaxis_title="Power (W)",
-                            height=400
-                        )
-                        st.plotly_chart(fig_power, use_container_width=True)
+                    if fig_power is not None:
+                        st.plotly_chart(go.Figure(fig_power), use_container_width=True)
                 else:
                     st.warning(f"No data available for {meter.name}")
         else:
@@ -1072,52 +2034,7 @@ def main():
         st.header("Multi-Meter Comparison")
         
         if len(dashboard.meters) > 1:
-            # Select meters to compare
-            compare_meters = st.multiselect(
-                "Select meters to compare",
-                options=list(dashboard.meters.keys()),
-                format_func=lambda x: dashboard.meters[x].name,
-                default=list(dashboard.meters.keys())[:min(3, len(dashboard.meters))]
-            )
-            
-            if compare_meters:
-                # Select parameter to compare
-                param_groups = {
-                    "Power": ['Total_Active_Power', 'Total_Reactive_Power', 'Total_Apparent_Power'],
-                    "Voltage": ['V1_N_Voltage', 'V2_N_Voltage', 'V3_N_Voltage', 'Average_Voltage_Vph_n'],
-                    "Current": ['L1_Current', 'L2_Current', 'L3_Current', 'Average_Current'],
-                    "Power Factor": ['Total_Power_Factor', 'L1_Power_Factor', 'L2_Power_Factor', 'L3_Power_Factor'],
-                    "Energy": ['Total_Active_Energy', 'Total_Reactive_Energy'],
-                    "Quality": ['Frequency', 'THD_R_Voltage_1', 'THD_R_Current_1']
-                }
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    param_group = st.selectbox("Parameter Group", list(param_groups.keys()))
-                with col2:
-                    parameter = st.selectbox("Parameter", param_groups[param_group])
-                
-                # Create comparison chart
-                fig = create_comparison_chart(dashboard, compare_meters, parameter, hours)
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Comparison table
-                st.subheader("Current Values Comparison")
-                comparison_data = []
-                
-                for meter_id in compare_meters:
-                    df = dashboard.get_meter_readings(meter_id, hours)
-                    if not df.empty:
-                        latest = df.iloc[0]
-                        comparison_data.append({
-                            'Meter': dashboard.meters[meter_id].name,
-                            'Location': dashboard.meters[meter_id].location,
-                            parameter: latest.get(parameter, 0)
-                        })
-                
-                if comparison_data:
-                    comparison_df = pd.DataFrame(comparison_data)
-                    st.dataframe(comparison_df, use_container_width=True, hide_index=True)
+            _comparison(hours)
         else:
             st.info("Add more meters to enable comparison features.")
     
@@ -1127,62 +2044,34 @@ def main():
         # Aggregate statistics
         st.subheader("System Statistics")
         
-        all_data = []
-        for meter_id in dashboard.meters.keys():
-            df = dashboard.get_meter_readings(meter_id, hours)
-            if not df.empty:
-                df['meter_name'] = dashboard.meters[meter_id].name
-                all_data.append(df)
+        stats = dashboard.get_system_stats(hours)
         
-        if all_data:
-            combined_df = pd.concat(all_data, ignore_index=True)
-            
+        if stats:
             # System health metrics
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                total_energy = combined_df.groupby('meter_name')['Total_Active_Energy'].last().sum()
+                total_energy = stats['Total_Energy']
                 st.metric("Total System Energy", f"{total_energy:.0f} Wh")
             
             with col2:
-                avg_efficiency = combined_df['Total_Power_Factor'].mean()
+                avg_efficiency = stats['Avg_Power_Factor']
                 efficiency_status = "🟢" if avg_efficiency > 0.9 else "🟡" if avg_efficiency > 0.8 else "🔴"
                 st.metric("System Efficiency", f"{efficiency_status} {avg_efficiency:.3f}")
             
             with col3:
-                max_demand = combined_df.groupby('timestamp')['Total_Active_Power'].sum().max()
+                max_demand = stats['Peak_Demand']
                 st.metric("Peak Demand", f"{max_demand:.1f} W")
             
             with col4:
-                load_factor = combined_df.groupby('timestamp')['Total_Active_Power'].sum().mean() / max_demand if max_demand > 0 else 0
+                load_factor = stats['Avg_Demand'] / max_demand if max_demand > 0 else 0
                 st.metric("Load Factor", f"{load_factor:.3f}")
             
             # Alert conditions
             st.subheader("System Alerts")
             
-            alerts = []
-            latest_df = dashboard.get_all_meters_latest()
-            
-            if not latest_df.empty:
-                # Check for power factor issues
-                low_pf_meters = latest_df[latest_df['Total_Power_Factor'] < 0.85]
-                if not low_pf_meters.empty:
-                    for _, meter in low_pf_meters.iterrows():
-                        alerts.append(f"⚠️ Low power factor on {meter['name']}: {meter['Total_Power_Factor']:.3f}")
-                
-                # Check for frequency deviations
-                freq_issues = latest_df[(latest_df['Frequency'] < 49.5) | (latest_df['Frequency'] > 50.5)]
-                if not freq_issues.empty:
-                    for _, meter in freq_issues.iterrows():
-                        alerts.append(f"⚠️ Frequency deviation on {meter['name']}: {meter['Frequency']:.2f} Hz")
-                
-                # Check for high THD
-                for col in ['THD_R_Voltage_1', 'THD_R_Current_1']:
-                    if col in latest_df.columns:
-                        high_thd = latest_df[latest_df[col] > 5]
-                        if not high_thd.empty:
-                            for _, meter in high_thd.iterrows():
-                                alerts.append(f"⚠️ High {col.replace('_', ' ')} on {meter['name']}: {meter[col]:.2f}%")
+            latest_df = dashboard.get_all_meters_latest(LATEST_SUMMARY_COLUMNS)
+            alerts = build_system_alerts(latest_df)
             
             if alerts:
                 for alert in alerts[:10]:  # Show max 10 alerts
@@ -1193,24 +2082,8 @@ def main():
             # Load distribution chart
             st.subheader("Load Distribution Over Time")
             
-            # FIX: Convert 'timestamp' column to datetime before resampling
-            combined_df['timestamp'] = pd.to_datetime(combined_df['timestamp'])
-            
-            hourly_data = combined_df.set_index('timestamp').resample('1H')['Total_Active_Power'].sum().reset_index()
-            
-            fig_load = go.Figure()
-            fig_load.add_trace(go.Bar(
-                x=hourly_data['timestamp'],
-                y=hourly_data['Total_Active_Power'],
-                marker_color='#4ECDC4'
-            ))
-            fig_load.update_layout(
-                title="Hourly Energy Consumption",
-                xaxis_title="Time",
-                yaxis_title="Energy (Wh)",
-                height=400
-            )
-            st.plotly_chart(fig_load, use_container_width=True)
+            fig_load = build_hourly_load_fig(dashboard.db_name, hours, dashboard.get_db_version())
+            st.plotly_chart(go.Figure(fig_load), use_container_width=True)
     
     with tab5:
         st.header("Data Export")
@@ -1224,49 +2097,47 @@ def main():
         if export_option == "All meters - Latest readings":
             df_export = dashboard.get_all_meters_latest()
         elif export_option == "All meters - Historical data":
-            all_data = []
-            for meter_id in dashboard.meters.keys():
-                df = dashboard.get_meter_readings(meter_id, hours)
-                if not df.empty:
-                    df['meter_name'] = dashboard.meters[meter_id].name
-                    all_data.append(df)
-            df_export = pd.concat(all_data, ignore_index=True) if all_data else pd.DataFrame()
+            df_export = dashboard.get_named_readings(hours=hours)
         elif export_option == "Selected meters - Historical data":
             selected_export = st.multiselect(
                 "Select meters to export",
                 options=list(dashboard.meters.keys()),
                 format_func=lambda x: dashboard.meters[x].name
             )
-            all_data = []
-            for meter_id in selected_export:
-                df = dashboard.get_meter_readings(meter_id, hours)
-                if not df.empty:
-                    df['meter_name'] = dashboard.meters[meter_id].name
-                    all_data.append(df)
-            df_export = pd.concat(all_data, ignore_index=True) if all_data else pd.DataFrame()
+            df_export = dashboard.get_named_readings(selected_export, hours)
         else:
-            # Raw database export
-            conn = sqlite3.connect(dashboard.db_name)
-            df_export = pd.read_sql_query("SELECT * FROM pac3200_readings ORDER BY timestamp DESC", conn)
-            conn.close()
+            # Raw database export: preview a page, stream the full table into the download
+            df_export = None
+            preview = pd.read_sql_query("SELECT * FROM pac3200_readings ORDER BY timestamp DESC LIMIT 100",
+                                        _db_reader(dashboard.db_name))
+            if preview.empty:
+                preview = dashboard.get_compressed_readings(limit=-(-100 // COMPACT_BLOCK_SIZE))
+                if not preview.empty:
+                    preview = preview.sort_values('timestamp', ascending=False).head(100)
         
-        if not df_export.empty:
-            st.dataframe(df_export.head(100), use_container_width=True)
+        if df_export is not None:
+            preview = df_export.head(100)
+        
+        if not preview.empty:
+            st.dataframe(preview, use_container_width=True)
             
             # Download button
-            csv = df_export.to_csv(index=False)
+            if df_export is None:
+                csv_data = build_raw_export_csv(dashboard, dashboard.db_name, dashboard.get_db_version())
+            else:
+                csv_data = _csv_bytes(df_export)
             st.download_button(
                 label="📥 Download as CSV",
-                data=csv,
+                data=csv_data,
                 file_name=f"pac3200_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv"
             )
         else:
             st.warning("No data available for export.")
     
-    # Auto refresh
-    if st.session_state.auto_refresh:
-        time.sleep(30)
+    # Without fragments, fall back to rerunning the whole page
+    if st.session_state.auto_refresh and not FRAGMENTS_AVAILABLE:
+        time.sleep(AUTO_REFRESH_SECONDS)
         st.rerun()
 
 if __name__ == "__main__":
@@ -0,0 +1,42 @@
+import math
+import random
+import struct
+
+import tsz
+
+
+def _bits(value):
+    return None if value is None else struct.pack('>d', value)
+
+
+def test_float_round_trip_edge_values():
+    values = [None, 0.0, -0.0, math.inf, -math.inf, 1e308, -1e308, 5e-324,
+              230.1, 230.1, 230.2, None, 49.98, 0.0, 1.0]
+    decoded = tsz.decode_floats(tsz.encode_floats(values))
+    # Compare bit patterns so -0.0 and 0.0 are told apart
+    assert [_bits(v) for v in decoded] == [_bits(v) for v in values]
+
+
+def test_float_round_trip_random():
+    rng = random.Random(0)
+    for _ in range(200):
+        values = [rng.choice([None, rng.uniform(-1e6, 1e6), rng.gauss(230, 2),
+                              struct.unpack('>d', rng.getrandbits(64).to_bytes(8, 'big'))[0]])
+                  for _ in range(rng.randint(0, 64))]
+        values = [None if v is not None and math.isnan(v) else v for v in values]
+        decoded = tsz.decode_floats(tsz.encode_floats(values))
+        assert [_bits(v) for v in decoded] == [_bits(v) for v in values]
+
+
+def test_timestamp_round_trip():
+    rng = random.Random(1)
+    for _ in range(100):
+        start = rng.randint(0, 2 ** 32)
+        timestamps = [start]
+        for _ in range(rng.randint(0, 64)):
+            timestamps.append(timestamps[-1] + rng.choice([1, 1, 2, 30, 3600, -5]))
+        assert tsz.decode_timestamps(tsz.encode_timestamps(timestamps)) == timestamps
+
+
+def test_format_parse_timestamp():
+    assert tsz.parse_timestamp(tsz.format_timestamp(1700000000)) == 1700000000
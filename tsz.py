@@ -0,0 +1,184 @@
+"""
+Gorilla-style compression for PAC3200 time series blocks
+Timestamps are stored as delta-of-delta varints, float values as XORs of
+consecutive values with leading/trailing zero counts (Pelkonen et al., 2015).
+"""
+
+import calendar
+import math
+import struct
+import time
+
+
+def _zigzag(n):
+    """Map a signed integer onto an unsigned one"""
+    return n << 1 if n >= 0 else ((-n) << 1) - 1
+
+
+def _unzigzag(z):
+    """Inverse of _zigzag"""
+    return (z >> 1) ^ -(z & 1)
+
+
+def _write_varint(out, n):
+    """Append an unsigned LEB128 varint to a bytearray"""
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(data, pos):
+    """Read an unsigned LEB128 varint; returns (value, next position)"""
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+class _BitWriter:
+    """Big-endian bit stream writer"""
+    def __init__(self):
+        self.buf = bytearray()
+        self.acc = 0
+        self.nbits = 0
+
+    def write(self, value, nbits):
+        self.acc = (self.acc << nbits) | value
+        self.nbits += nbits
+        while self.nbits >= 8:
+            self.nbits -= 8
+            self.buf.append((self.acc >> self.nbits) & 0xFF)
+        self.acc &= (1 << self.nbits) - 1
+
+    def getvalue(self):
+        if self.nbits:
+            self.buf.append((self.acc << (8 - self.nbits)) & 0xFF)
+            self.acc = self.nbits = 0
+        return bytes(self.buf)
+
+
+class _BitReader:
+    """Big-endian bit stream reader"""
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos * 8
+
+    def read(self, nbits):
+        start = self.pos >> 3
+        end = (self.pos + nbits + 7) >> 3
+        chunk = int.from_bytes(self.data[start:end], 'big')
+        shift = (end - start) * 8 - (self.pos & 7) - nbits
+        self.pos += nbits
+        return (chunk >> shift) & ((1 << nbits) - 1)
+
+
+def parse_timestamp(value):
+    """Convert a SQLite 'YYYY-MM-DD HH:MM:SS' UTC timestamp to epoch seconds"""
+    return calendar.timegm(time.strptime(str(value)[:19], '%Y-%m-%d %H:%M:%S'))
+
+
+def format_timestamp(seconds):
+    """Convert epoch seconds back to a SQLite UTC timestamp string"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(seconds))
+
+
+def encode_timestamps(timestamps):
+    """Compress integer epoch seconds as delta-of-delta zigzag varints"""
+    out = bytearray()
+    _write_varint(out, len(timestamps))
+
+    prev = prev_delta = 0
+    for i, ts in enumerate(timestamps):
+        if i == 0:
+            _write_varint(out, _zigzag(ts))
+        else:
+            delta = ts - prev
+            _write_varint(out, _zigzag(delta - prev_delta))
+            prev_delta = delta
+        prev = ts
+
+    return bytes(out)
+
+
+def decode_timestamps(data):
+    """Inverse of encode_timestamps"""
+    count, pos = _read_varint(data, 0)
+    timestamps = []
+
+    prev = prev_delta = 0
+    for i in range(count):
+        value, pos = _read_varint(data, pos)
+        if i == 0:
+            prev = _unzigzag(value)
+        else:
+            prev_delta += _unzigzag(value)
+            prev += prev_delta
+        timestamps.append(prev)
+
+    return timestamps
+
+
+def encode_floats(values):
+    """Compress floats with Gorilla XOR encoding; None is stored as NaN"""
+    header = bytearray()
+    _write_varint(header, len(values))
+    writer = _BitWriter()
+
+    prev_bits = 0
+    prev_lead = prev_trail = -1
+    for i, value in enumerate(values):
+        bits = struct.unpack('>Q', struct.pack('>d', math.nan if value is None else value))[0]
+
+        if i == 0:
+            writer.write(bits, 64)
+        else:
+            xor = bits ^ prev_bits
+            if xor == 0:
+                writer.write(0, 1)
+            else:
+                lead = min(64 - xor.bit_length(), 31)
+                trail = (xor & -xor).bit_length() - 1
+
+                if prev_lead >= 0 and lead >= prev_lead and trail >= prev_trail:
+                    # Meaningful bits fit inside the previous window
+                    writer.write(0b10, 2)
+                    writer.write(xor >> prev_trail, 64 - prev_lead - prev_trail)
+                else:
+                    significant = 64 - lead - trail
+                    writer.write(0b11, 2)
+                    writer.write(lead, 5)
+                    writer.write(significant - 1, 6)
+                    writer.write(xor >> trail, significant)
+                    prev_lead, prev_trail = lead, trail
+
+        prev_bits = bits
+
+    return bytes(header) + writer.getvalue()
+
+
+def decode_floats(data):
+    """Inverse of encode_floats; NaN is returned as None"""
+    count, pos = _read_varint(data, 0)
+    reader = _BitReader(data, pos)
+    values = []
+
+    bits = 0
+    lead = trail = 0
+    for i in range(count):
+        if i == 0:
+            bits = reader.read(64)
+        elif reader.read(1):
+            if reader.read(1):
+                lead = reader.read(5)
+                trail = 64 - lead - (reader.read(6) + 1)
+            bits ^= reader.read(64 - lead - trail) << trail
+
+        value = struct.unpack('>d', struct.pack('>Q', bits))[0]
+        values.append(None if math.isnan(value) else value)
+
+    return values